@@ -0,0 +1,179 @@
+import math
+import os
+import threading
+import time
+import logging
+from collections import deque
+
+from flask import g, jsonify, request
+
+from metrics import ADMISSION_QUEUE_DEPTH, SHED_TOTAL
+
+logger = logging.getLogger(__name__)
+
+# Request header carrying the client's time budget in seconds
+REQUEST_TIMEOUT_HEADER = 'X-Request-Timeout'
+
+# ── Deadlines ─────────────────────────────────────────────────────────────────
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget has run out"""
+
+_local = threading.local()
+
+def set_deadline(deadline):
+    """Absolute time.time() deadline for work on this thread, or None for no limit"""
+    _local.deadline = deadline
+
+def clear_deadline():
+    _local.deadline = None
+
+def remaining_time():
+    """Seconds left before this thread's deadline, or None without one"""
+    deadline = getattr(_local, 'deadline', None)
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+def check_deadline():
+    """Raise DeadlineExceeded if this thread's deadline has passed"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+# ── Admission control ─────────────────────────────────────────────────────────
+
+class QueueFull(Exception):
+    """Raised when a request cannot be admitted; retry_after is a hint in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounded in-flight limit with a short wait queue, plus per-request deadlines.
+
+    Up to ``max_in_flight`` requests run at once and up to ``max_queue`` more
+    wait at most ``queue_timeout`` seconds for a slot. Anything beyond that is
+    refused with 429 and a Retry-After hint, so overload turns into fast
+    rejections instead of every request timing out. Each request gets a
+    deadline from ``X-Request-Timeout`` (capped at ``request_timeout``) that
+    later stages check; see check_deadline and remaining_time.
+    """
+
+    def __init__(self, max_in_flight=4, max_queue=8, queue_timeout=2.0, request_timeout=60.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.exempt = set()
+        self.streaming = set()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._durations = deque(maxlen=200)
+        self._counts = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timedOut': 0}
+
+    @classmethod
+    def from_env(cls):
+        """Configured by MAX_IN_FLIGHT, MAX_QUEUE, QUEUE_TIMEOUT and REQUEST_TIMEOUT (per worker process)"""
+        return cls(
+            max_in_flight=int(os.environ.get('MAX_IN_FLIGHT', 4)),
+            max_queue=int(os.environ.get('MAX_QUEUE', 8)),
+            queue_timeout=float(os.environ.get('QUEUE_TIMEOUT', 2)),
+            request_timeout=float(os.environ.get('REQUEST_TIMEOUT', 60))
+        )
+
+    def init_app(self, app, exempt=(), streaming=()):
+        """Gate the app's endpoints. ``exempt`` endpoints (health, metrics, ...) skip
+        the limit; ``streaming`` endpoints only get a deadline when the client sends one."""
+        self.exempt = set(exempt)
+        self.streaming = set(streaming)
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    def _retry_after(self):
+        # Work ahead of a new request divided by the recent service rate
+        average = sum(self._durations) / len(self._durations) if self._durations else 1.0
+        backlog = self._waiting + self._in_flight
+        return max(1, math.ceil(average * backlog / max(1, self.max_in_flight)))
+
+    def acquire(self, timeout=None):
+        """Take an in-flight slot, queueing for up to ``timeout`` seconds; raises QueueFull"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._condition:
+            if self._in_flight >= self.max_in_flight or self._waiting:
+                if self._waiting >= self.max_queue:
+                    self._counts['rejected'] += 1
+                    raise QueueFull(self._retry_after())
+                self._waiting += 1
+                self._counts['queued'] += 1
+                ADMISSION_QUEUE_DEPTH.inc()
+                try:
+                    admitted = self._condition.wait_for(lambda: self._in_flight < self.max_in_flight,
+                                                        timeout=max(0.0, timeout))
+                finally:
+                    self._waiting -= 1
+                    ADMISSION_QUEUE_DEPTH.dec()
+                if not admitted:
+                    self._counts['timedOut'] += 1
+                    raise QueueFull(self._retry_after())
+            self._in_flight += 1
+            self._counts['admitted'] += 1
+            return time.time()
+
+    def release(self, admitted_at):
+        with self._condition:
+            self._in_flight -= 1
+            self._durations.append(time.time() - admitted_at)
+            self._condition.notify()
+
+    def request_budget(self):
+        """Seconds this request may take, or None for no deadline"""
+        default = None if request.endpoint in self.streaming else self.request_timeout
+        header = request.headers.get(REQUEST_TIMEOUT_HEADER)
+        if header is None:
+            return default
+        try:
+            budget = float(header)
+        except ValueError:
+            return default
+        if budget <= 0:
+            return default
+        return budget if default is None else min(budget, default)
+
+    def _admit(self):
+        budget = self.request_budget()
+        set_deadline(None if budget is None else time.time() + budget)
+        if request.endpoint in self.exempt or request.endpoint is None or request.method == 'OPTIONS':
+            return None
+
+        remaining = remaining_time()
+        try:
+            g.admitted_at = self.acquire(self.queue_timeout if remaining is None
+                                         else min(self.queue_timeout, remaining))
+        except QueueFull as e:
+            if remaining_time() is not None and remaining_time() <= 0:
+                SHED_TOTAL.inc(reason='deadline')
+                return jsonify({"error": "Request deadline exceeded while queued"}), 504
+            SHED_TOTAL.inc(reason='busy')
+            logger.warning(f"Shedding {request.method} {request.path}: {e}")
+            return jsonify({"error": "Server busy, try again later"}), 429, {'Retry-After': str(e.retry_after)}
+        return None
+
+    def _release(self, exception=None):
+        # Runs after a streamed response has been fully sent
+        admitted_at = g.pop('admitted_at', None)
+        if admitted_at is not None:
+            self.release(admitted_at)
+        clear_deadline()
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._counts)
+            stats['inFlight'] = self._in_flight
+            stats['queueDepth'] = self._waiting
+        stats['maxInFlight'] = self.max_in_flight
+        stats['maxQueue'] = self.max_queue
+        stats['requestTimeout'] = self.request_timeout
+        return stats
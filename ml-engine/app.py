@@ -1,8 +1,29 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from nlp_processor import calculate_match_score, parse_resume_text, extract_text_from_pdf
+from nlp_processor import (calculate_match_score, parse_resume_text, parse_resume_batch,
+                           rank_resumes, shortlist_resumes, model_status, warm_up, job_artifacts,
+                           SPACY_BATCH_SIZE, MODEL_VERSION, PARSER_VERSION)
+from skill_taxonomy import TaxonomyReloader, current_taxonomy
+from parse_cache import ParseCache, cache_key
+from vector_index import VectorIndex
+from job_registry import JobRegistry
+from pdf_extraction import PDF_MAX_PAGES, PDF_TIMEOUT, extract_pdf
+from task_queue import create_task_queue, callback_url_allowed, QueueFullError
+from profiling import RequestProfiler
+from near_duplicates import NearDuplicateIndex, minhash_signature
+from single_flight import SingleFlight, WaitTimeout
+from admission import AdmissionController, DeadlineExceeded, check_deadline, remaining_time
+from cpu_pool import CpuPool
+from serialization import FastJSONProvider, compress_response
+from metrics import (COALESCED_TOTAL, REQUESTS_IN_FLIGHT, REQUESTS_TOTAL, REQUEST_SECONDS, SHED_TOTAL,
+                     observe_document, render_metrics)
 import os
+import json
+import math
+import time
 import logging
+from io import BytesIO
+from itertools import islice
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,6 +32,259 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+# orjson encoding, ?fields= projection and MessagePack for jsonify responses;
+# gzip/deflate for sizeable bodies when the client accepts it
+app.json = FastJSONProvider(app)
+app.after_request(compress_response)
+
+# Endpoints that read an NDJSON body line by line instead of buffering it
+STREAMING_ENDPOINTS = {'bulk_parse_endpoint', 'bulk_match_endpoint'}
+
+class InMemoryRequest(Request):
+    """Keeps multipart file parts in memory; Werkzeug spools parts of bodies
+    over 500KB to temporary files. MAX_CONTENT_LENGTH bounds the size, except
+    for NDJSON bodies of the streaming endpoints, which are never held whole."""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint in STREAMING_ENDPOINTS and self.mimetype != 'multipart/form-data':
+            return None
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return BytesIO()
+
+app.request_class = InMemoryRequest
+
+# Uploads larger than this are rejected with 413 before reaching the parser
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 20)) * 1024 * 1024
+
+# Upper bound on resumes accepted by a single ranking request
+MAX_RANK_BATCH = int(os.environ.get('MAX_RANK_BATCH', 5000))
+
+# Content-addressed cache for PDF extraction and parse results
+parse_cache = ParseCache.from_env()
+
+# Talent pool index for top-k resume search
+resume_index = VectorIndex.from_env('RESUME_INDEX')
+
+# Open jobs for reverse matching (resume -> jobs)
+job_registry = JobRegistry.from_env()
+
+# Documents per batch on the streaming bulk endpoints
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', SPACY_BATCH_SIZE))
+
+# Upper bound on results returned by a single search
+MAX_SEARCH_K = int(os.environ.get('MAX_SEARCH_K', 1000))
+
+# Background parsing for bulk uploads
+task_queue = create_task_queue()
+
+# MinHash/LSH index of resumes already seen, for near-duplicate detection.
+# It lives in this process's memory: with several gunicorn workers, /dedup and
+# /bulk/parse?dedup=1 only see resumes that reached the same worker
+near_duplicate_index = NearDuplicateIndex.from_env()
+
+# Identical parse/match requests arriving together share one computation
+in_flight = SingleFlight()
+
+# Bounded concurrency: in-flight limit, short wait queue, per-request deadlines
+admission = AdmissionController.from_env()
+
+# Worker processes for parsing and scoring, so request threads stay responsive
+cpu_pool = CpuPool.from_env()
+
+# Hot reload of the skill taxonomy and scoring weights from their config file
+taxonomy_reloader = TaxonomyReloader.from_env()
+
+def reload_config_if_changed():
+    """Swap in an edited taxonomy config; pool workers forked with the old one are retired"""
+    if taxonomy_reloader.maybe_reload() is not None:
+        cpu_pool.restart()
+
+def coalesced(endpoint, key, compute):
+    """compute() once for concurrent requests with the same key; returns its result
+
+    Each request waits only for its own remaining budget. If the request doing
+    the work runs out of time, waiters still within theirs take over.
+    """
+    check_deadline()
+    try:
+        result, shared = in_flight.do(f"{endpoint}:{key}", compute, timeout=remaining_time(),
+                                      unshared=(DeadlineExceeded,))
+    except WaitTimeout:
+        raise DeadlineExceeded(f"Request deadline exceeded waiting for a coalesced {endpoint}")
+    if shared:
+        COALESCED_TOTAL.inc(endpoint=endpoint)
+    return result
+
+# Opt-in per-request cProfile dumps, read back as folded stacks from
+# /debug/profiles/<id>; nothing is installed unless PROFILE_DIR is set
+request_profiler = RequestProfiler.from_env()
+if request_profiler is not None:
+    request_profiler.init_app(app)
+
+app.before_request(reload_config_if_changed)
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+@app.after_request
+def count_request(response):
+    REQUESTS_TOTAL.inc(endpoint=request.endpoint or 'unmatched', method=request.method,
+                       status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exception=None):
+    # Runs after a streamed response has been fully sent
+    if 'metrics_started' in g:
+        REQUESTS_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_started, endpoint=g.metrics_endpoint)
+
+# Cheap endpoints skip the in-flight limit; bulk streams only get a deadline on request
+admission.init_app(app, exempt={
+    'health_check', 'readiness_check', 'metrics_endpoint', 'cache_stats_endpoint', 'index_stats_endpoint',
+    'task_stats_endpoint', 'task_status_endpoint', 'dedup_stats_endpoint', 'admission_stats_endpoint',
+    'config_endpoint', 'reload_config_endpoint', 'job_cache_stats_endpoint'
+}, streaming={'bulk_parse_endpoint', 'bulk_match_endpoint'})
+
+@app.errorhandler(DeadlineExceeded)
+def deadline_exceeded(e):
+    SHED_TOTAL.inc(reason='deadline')
+    logger.warning(f"Deadline exceeded for {request.method} {request.path}")
+    return jsonify({"error": "Request deadline exceeded"}), 504
+
+def cached_pdf_text(pdf_bytes, workers=None):
+    """Extract PDF text, reusing earlier results for identical bytes"""
+    key = cache_key('pdf', pdf_bytes, (PDF_MAX_PAGES,))
+    text = parse_cache.get(key)
+    if text is not None:
+        return text
+    
+    remaining = remaining_time()
+    timeout = None if remaining is None else max(0.0, min(PDF_TIMEOUT, remaining))
+    try:
+        text, complete = extract_pdf(pdf_bytes, workers=workers, timeout=timeout)
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {e}")
+        return ""
+    # Text cut short by the request deadline fails the request
+    check_deadline()
+    # Partial text (PDF_TIMEOUT, a crashed worker) is returned but never cached
+    if complete and text:
+        parse_cache.set(key, text)
+    return text
+
+def uploaded_pdf_bytes():
+    """PDF bytes from a multipart 'file' field or a raw application/pdf body, else None"""
+    upload = request.files.get('file')
+    if upload is not None:
+        return upload.read()
+    if request.mimetype in ('application/pdf', 'application/octet-stream'):
+        return request.get_data()
+    return None
+
+def parse_cache_key(text):
+    return cache_key('parse', text, (current_taxonomy().fingerprint, MODEL_VERSION, PARSER_VERSION))
+
+def cached_parse(text):
+    """Parse text, reusing earlier results for the same text, taxonomy and model"""
+    observe_document('resume', text)
+    return parse_cache.get_or_compute(parse_cache_key(text), lambda: cpu_pool.run(parse_resume_text, text))
+
+def cached_parse_batch(texts):
+    """Parse many texts; cache misses share one batched NER pass"""
+    for text in texts:
+        observe_document('resume', text)
+    keys = [parse_cache_key(text) for text in texts]
+    results = [parse_cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    for i, result in zip(missing, cpu_pool.run(parse_resume_batch, [texts[i] for i in missing])):
+        if 'error' not in result:
+            parse_cache.set(keys[i], result)
+        results[i] = result
+    return results
+
+def read_resume_input(data):
+    """Resume source from the request: (pdf_bytes, resume_text, error message)"""
+    pdf_bytes = uploaded_pdf_bytes()
+    
+    # Handle in-memory upload; the file never touches disk
+    if pdf_bytes is not None:
+        if not pdf_bytes.startswith(b'%PDF'):
+            return None, None, "Uploaded file is not a PDF"
+        return pdf_bytes, None, None
+    
+    # Handle file path (from backend upload)
+    if 'filePath' in data:
+        file_path = data.get('filePath')
+        if not os.path.exists(file_path):
+            return None, None, "File not found"
+        with open(file_path, 'rb') as f:
+            return f.read(), None, None
+    
+    # Handle direct text input
+    if 'resume_text' in data:
+        return None, data.get('resume_text', ''), None
+    
+    return None, None, "Missing file, filePath or resume_text"
+
+def build_parse_response(resume_text):
+    """Parse resume text into the parse-resume response shape"""
+    results = cached_parse(resume_text)
+    return {
+        'rawText': resume_text,
+        'skills': results.get('skills', []),
+        'experience': results.get('experience', 'Not specified'),
+        'education': results.get('education', ['Not specified']),
+        'textLength': len(resume_text)
+    }
+
+def parse_resume_response(pdf_bytes, resume_text):
+    """(response body, status code) for a parse-resume input"""
+    # Extract text from PDF
+    if pdf_bytes is not None:
+        resume_text = cached_pdf_text(pdf_bytes)
+        if not resume_text:
+            return {"error": "Could not extract text from file"}, 400
+    
+    if not resume_text.strip():
+        return {"error": "Empty resume text"}, 400
+    
+    # Parse the resume
+    return build_parse_response(resume_text), 200
+
+def parse_resume_task(pdf_bytes, resume_text):
+    """Background task body for /api/ml/tasks/parse-resume"""
+    # Task workers are separate processes; each watches the config file itself
+    taxonomy_reloader.maybe_reload()
+    if pdf_bytes is not None:
+        # Already inside a worker process, so no page-parallel extraction
+        resume_text = cached_pdf_text(pdf_bytes, workers=1)
+        if not resume_text:
+            raise ValueError("Could not extract text from file")
+    if not resume_text or not resume_text.strip():
+        raise ValueError("Empty resume text")
+    return build_parse_response(resume_text)
+
+def format_match_result(results):
+    """Convert a match result into the API response shape"""
+    return {
+        'score': results.get('match_score', 0),
+        'matchedSkills': results.get('matched_skills', []),
+        'missingSkills': results.get('missing_skills', []),
+        'suggestions': results.get('suggestions', []),
+        'details': {
+            'textSimilarity': results.get('text_similarity', 0),
+            'skillMatch': results.get('skill_match_percentage', 0),
+            'atsScore': results.get('ats_score', 0)
+        }
+    }
+
 @app.route('/api/ml/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -20,50 +294,56 @@ def health_check():
         'version': '1.0.0'
     })
 
+@app.route('/api/ml/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 200 once models are loaded and warmed up, 503 until then"""
+    status = model_status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 @app.route('/api/ml/parse-resume', methods=['POST'])
 def parse_resume_endpoint():
-    """Parse resume from file path or text"""
+    """Parse resume from an uploaded PDF (multipart or raw bytes), file path or text.
+    
+    The response echoes rawText; ?fields=skills,experience,education leaves it out.
+    """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        pdf_bytes, resume_text, error = read_resume_input(data)
+        if error:
+            return jsonify({"error": error}), 400
         
-        # Handle file path (from backend upload)
-        if 'filePath' in data:
-            file_path = data.get('filePath')
-            if not os.path.exists(file_path):
-                return jsonify({"error": "File not found"}), 400
-            
-            # Extract text from PDF
-            resume_text = extract_text_from_pdf(file_path)
-            if not resume_text:
-                return jsonify({"error": "Could not extract text from file"}), 400
-        
-        # Handle direct text input
-        elif 'resume_text' in data:
-            resume_text = data.get('resume_text', '')
+        if pdf_bytes is not None:
+            key = cache_key('pdf', pdf_bytes)
         else:
-            return jsonify({"error": "Missing filePath or resume_text"}), 400
-
-        if not resume_text.strip():
-            return jsonify({"error": "Empty resume text"}), 400
-
-        # Parse the resume
-        results = parse_resume_text(resume_text)
-        
-        return jsonify({
-            'rawText': resume_text,
-            'skills': results.get('skills', []),
-            'experience': results.get('experience', 'Not specified'),
-            'education': results.get('education', ['Not specified']),
-            'textLength': len(resume_text)
-        })
+            key = cache_key('text', resume_text)
+        body, status = coalesced('parse-resume', key, lambda: parse_resume_response(pdf_bytes, resume_text))
+        return jsonify(body), status
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error in parse_resume_endpoint: {e}")
         return jsonify({"error": "Failed to parse resume"}), 500
 
+def skill_weights_error(skill_weights):
+    """Why skillWeights is invalid, or None: it must map skills to positive numbers"""
+    if skill_weights is None:
+        return None
+    if not isinstance(skill_weights, dict):
+        return "skillWeights must be an object"
+    for skill, weight in skill_weights.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight) or weight <= 0:
+            return f"skillWeights['{skill}'] must be a positive number"
+    return None
+
 @app.route('/api/ml/calculate-match', methods=['POST'])
 def calculate_match_endpoint():
-    """Calculate match score between resume and job description"""
+    """Calculate match score between resume and job description.
+    
+    An optional jobId lets repeated matches against the same posting reuse its
+    preprocessed text and skills; jobText and jobSkills are still required and
+    a changed posting is reprocessed.
+    """
     try:
         data = request.get_json()
         
@@ -71,58 +351,707 @@ def calculate_match_endpoint():
         job_text = data.get('jobText', '')
         resume_skills = data.get('resumeSkills', [])
         job_skills = data.get('jobSkills', [])
+        skill_weights = data.get('skillWeights')
+        job_id = data.get('jobId')
         
         if not resume_text or not job_text:
             return jsonify({"error": "Missing resume text or job text"}), 400
+        if skill_weights_error(skill_weights):
+            return jsonify({"error": skill_weights_error(skill_weights)}), 400
+        if job_id is not None and not isinstance(job_id, (str, int)):
+            return jsonify({"error": "jobId must be a string or number"}), 400
+        observe_document('resume', resume_text)
+        observe_document('job', job_text)
         
         # Calculate match score
-        results = calculate_match_score(
-            resume_text=resume_text,
-            job_description_text=job_text,
-            job_skills=job_skills,
-            resume_skills=resume_skills
-        )
+        def compute():
+            return format_match_result(cpu_pool.run(
+                calculate_match_score,
+                resume_text=resume_text,
+                job_description_text=job_text,
+                job_skills=job_skills,
+                resume_skills=resume_skills,
+                skill_weights=skill_weights,
+                job_id=None if job_id is None else str(job_id)
+            ))
         
-        return jsonify({
-            'score': results.get('match_score', 0),
-            'matchedSkills': results.get('matched_skills', []),
-            'missingSkills': results.get('missing_skills', []),
-            'suggestions': results.get('suggestions', []),
-            'details': {
-                'textSimilarity': results.get('text_similarity', 0),
-                'skillMatch': results.get('skill_match_percentage', 0),
-                'atsScore': results.get('ats_score', 0)
-            }
-        })
+        key = cache_key('request', json.dumps(data, sort_keys=True))
+        return jsonify(coalesced('calculate-match', key, compute))
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error in calculate_match_endpoint: {e}")
         return jsonify({"error": "Failed to calculate match"}), 500
 
+@app.route('/api/ml/rank', methods=['POST'])
+def rank_endpoint():
+    """Rank many resumes against one job description in a single pass"""
+    try:
+        data = request.get_json()
+        
+        job_text = data.get('jobText', '')
+        job_skills = data.get('jobSkills', [])
+        resumes = data.get('resumes', [])
+        
+        if not job_text:
+            return jsonify({"error": "Missing job text"}), 400
+        if not isinstance(resumes, list) or not resumes:
+            return jsonify({"error": "Missing resumes"}), 400
+        if len(resumes) > MAX_RANK_BATCH:
+            return jsonify({"error": f"Too many resumes (max {MAX_RANK_BATCH})"}), 400
+        if skill_weights_error(data.get('skillWeights')):
+            return jsonify({"error": skill_weights_error(data['skillWeights'])}), 400
+        
+        batch = [{
+            'id': resume.get('id'),
+            'text': resume.get('resumeText', ''),
+            'skills': resume.get('resumeSkills', [])
+        } for resume in resumes]
+        observe_document('job', job_text)
+        for resume in batch:
+            observe_document('resume', resume['text'])
+        
+        results = cpu_pool.run(rank_resumes, job_text, job_skills, batch, data.get('skillWeights'))
+        if 'error' in results:
+            return jsonify({"error": "Failed to rank resumes"}), 500
+        
+        ranked = []
+        for result in results['results']:
+            entry = format_match_result(result)
+            entry['id'] = result.get('id')
+            ranked.append(entry)
+        
+        return jsonify({
+            'results': ranked,
+            'count': len(ranked)
+        })
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error in rank_endpoint: {e}")
+        return jsonify({"error": "Failed to rank resumes"}), 500
+
+@app.route('/api/ml/shortlist', methods=['POST'])
+def shortlist_endpoint():
+    """Return only the k best resumes for a job, pruning resumes that cannot make the cut"""
+    try:
+        data = request.get_json()
+        
+        job_text = data.get('jobText', '')
+        job_skills = data.get('jobSkills', [])
+        resumes = data.get('resumes', [])
+        k = data.get('k', 10)
+        
+        if not job_text:
+            return jsonify({"error": "Missing job text"}), 400
+        if not isinstance(resumes, list) or not resumes:
+            return jsonify({"error": "Missing resumes"}), 400
+        if len(resumes) > MAX_RANK_BATCH:
+            return jsonify({"error": f"Too many resumes (max {MAX_RANK_BATCH})"}), 400
+        if not isinstance(k, int) or k < 1 or k > MAX_SEARCH_K:
+            return jsonify({"error": f"k must be between 1 and {MAX_SEARCH_K}"}), 400
+        if skill_weights_error(data.get('skillWeights')):
+            return jsonify({"error": skill_weights_error(data['skillWeights'])}), 400
+        
+        batch = [{
+            'id': resume.get('id'),
+            'text': resume.get('resumeText', ''),
+            'skills': resume.get('resumeSkills', [])
+        } for resume in resumes]
+        observe_document('job', job_text)
+        for resume in batch:
+            observe_document('resume', resume['text'])
+        
+        results = cpu_pool.run(shortlist_resumes, job_text, job_skills, batch, k, data.get('skillWeights'))
+        if 'error' in results:
+            return jsonify({"error": "Failed to shortlist resumes"}), 500
+        
+        shortlist = []
+        for result in results['results']:
+            entry = format_match_result(result)
+            entry['id'] = result.get('id')
+            shortlist.append(entry)
+        
+        return jsonify({
+            'results': shortlist,
+            'count': len(shortlist),
+            'candidates': results['candidates'],
+            'scored': results['scored']
+        })
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error in shortlist_endpoint: {e}")
+        return jsonify({"error": "Failed to shortlist resumes"}), 500
+
 @app.route('/api/ml/analyze-job', methods=['POST'])
 def analyze_job_endpoint():
-    """Analyze job description and extract key information"""
+    """Analyze job description and extract key information (?fields= can drop cleanedText)"""
     try:
         data = request.get_json()
         job_text = data.get('jobText', '')
+        job_id = data.get('jobId')
         
         if not job_text:
             return jsonify({"error": "Missing job text"}), 400
         
         # Parse job description (reuse resume parsing logic)
-        results = parse_resume_text(job_text)
+        results = cached_parse(job_text)
         
-        return jsonify({
+        response = {
             'skills': results.get('skills', []),
             'experience': results.get('experience', 'Not specified'),
             'textLength': len(job_text),
             'cleanedText': job_text.strip()
-        })
+        }
+        
+        # Register or update the job for reverse matching
+        if job_id is not None:
+            job_registry.register(str(job_id), job_text, data.get('jobSkills') or response['skills'])
+            response['jobId'] = str(job_id)
+            response['registered'] = True
         
+        return jsonify(response)
+        
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error in analyze_job_endpoint: {e}")
         return jsonify({"error": "Failed to analyze job"}), 500
 
+@app.route('/api/ml/index/resumes', methods=['POST'])
+def index_resumes_endpoint():
+    """Add or replace resumes in the search index"""
+    try:
+        data = request.get_json()
+        resumes = data.get('resumes', [])
+        
+        if not isinstance(resumes, list) or not resumes:
+            return jsonify({"error": "Missing resumes"}), 400
+        if any(resume.get('id') is None or not resume.get('resumeText') for resume in resumes):
+            return jsonify({"error": "Each resume needs an id and resumeText"}), 400
+        
+        added = resume_index.add((resume['id'], resume['resumeText']) for resume in resumes)
+        
+        return jsonify({
+            'added': added,
+            'size': len(resume_index)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in index_resumes_endpoint: {e}")
+        return jsonify({"error": "Failed to index resumes"}), 500
+
+@app.route('/api/ml/index/resumes/<resume_id>', methods=['DELETE'])
+def remove_indexed_resume_endpoint(resume_id):
+    """Remove a resume from the search index"""
+    try:
+        removed = resume_index.remove([resume_id])
+        if not removed:
+            return jsonify({"error": "Resume not indexed"}), 404
+        
+        return jsonify({
+            'removed': removed,
+            'size': len(resume_index)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in remove_indexed_resume_endpoint: {e}")
+        return jsonify({"error": "Failed to remove resume"}), 500
+
+@app.route('/api/ml/index/stats', methods=['GET'])
+def index_stats_endpoint():
+    """Resume index size and storage details"""
+    return jsonify(resume_index.stats())
+
+@app.route('/api/ml/search', methods=['POST'])
+def search_endpoint():
+    """Return the top-k indexed resumes for a job description"""
+    try:
+        data = request.get_json()
+        job_text = data.get('jobText', '')
+        k = data.get('k', 10)
+        
+        if not job_text:
+            return jsonify({"error": "Missing job text"}), 400
+        if not isinstance(k, int) or k < 1 or k > MAX_SEARCH_K:
+            return jsonify({"error": f"k must be between 1 and {MAX_SEARCH_K}"}), 400
+        
+        results = [{
+            'id': resume_id,
+            'textSimilarity': round(similarity * 100, 2)
+        } for resume_id, similarity in resume_index.search(job_text, k)]
+        
+        return jsonify({
+            'results': results,
+            'count': len(results)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in search_endpoint: {e}")
+        return jsonify({"error": "Failed to search resumes"}), 500
+
+@app.route('/api/ml/recommend-jobs', methods=['POST'])
+def recommend_jobs_endpoint():
+    """Score one resume against every registered job and return the top-k"""
+    try:
+        data = request.get_json()
+        resume_text = data.get('resumeText', '')
+        resume_skills = data.get('resumeSkills', [])
+        k = data.get('k', 10)
+        
+        if not resume_text:
+            return jsonify({"error": "Missing resume text"}), 400
+        if not isinstance(k, int) or k < 1 or k > MAX_SEARCH_K:
+            return jsonify({"error": f"k must be between 1 and {MAX_SEARCH_K}"}), 400
+        
+        if not resume_skills:
+            resume_skills = cached_parse(resume_text).get('skills', [])
+        
+        results = [{
+            'jobId': result['job_id'],
+            'score': result['match_score'],
+            'matchedSkills': result['matched_skills'],
+            'missingSkills': result['missing_skills'],
+            'details': {
+                'textSimilarity': result['text_similarity'],
+                'skillMatch': result['skill_match_percentage']
+            }
+        } for result in job_registry.recommend(resume_text, resume_skills, k)]
+        
+        return jsonify({
+            'results': results,
+            'count': len(results)
+        })
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error in recommend_jobs_endpoint: {e}")
+        return jsonify({"error": "Failed to recommend jobs"}), 500
+
+@app.route('/api/ml/jobs/<job_id>', methods=['DELETE'])
+def remove_job_endpoint(job_id):
+    """Remove a job from the reverse-matching registry and the match artifact cache"""
+    try:
+        cached = job_artifacts.remove(job_id)
+        if not job_registry.remove(job_id) and not cached:
+            return jsonify({"error": "Job not registered"}), 404
+        return jsonify({'removed': True, 'size': len(job_registry)})
+        
+    except Exception as e:
+        logger.error(f"Error in remove_job_endpoint: {e}")
+        return jsonify({"error": "Failed to remove job"}), 500
+
+@app.route('/api/ml/jobs/cache/stats', methods=['GET'])
+def job_cache_stats_endpoint():
+    """Job artifact cache counters (of this process; with CPU_POOL_WORKERS the pool workers keep their own)"""
+    return jsonify(job_artifacts.stats())
+
+@app.route('/api/ml/tasks/parse-resume', methods=['POST'])
+def submit_parse_task_endpoint():
+    """Queue a resume for background parsing and return a task ID right away"""
+    try:
+        data = request.get_json(silent=True) or {}
+        pdf_bytes, resume_text, error = read_resume_input(data)
+        if error:
+            return jsonify({"error": error}), 400
+        if pdf_bytes is None and not resume_text.strip():
+            return jsonify({"error": "Empty resume text"}), 400
+        
+        callback_url = data.get('callbackUrl') or request.form.get('callbackUrl') or request.args.get('callbackUrl')
+        if callback_url and not callback_url_allowed(callback_url):
+            return jsonify({"error": "callbackUrl must be an http(s) URL on an allowed host"}), 400
+        
+        try:
+            task_id = task_queue.submit(parse_resume_task, pdf_bytes, resume_text,
+                                        kind='parse-resume', callback_url=callback_url)
+        except QueueFullError as e:
+            return jsonify({"error": str(e)}), 429, {'Retry-After': '5'}
+        
+        return jsonify({
+            'taskId': task_id,
+            'status': 'queued',
+            'statusUrl': f"/api/ml/tasks/{task_id}"
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error in submit_parse_task_endpoint: {e}")
+        return jsonify({"error": "Failed to queue resume"}), 500
+
+@app.route('/api/ml/tasks/stats', methods=['GET'])
+def task_stats_endpoint():
+    """Queue depth, outcomes and wait-time metrics"""
+    return jsonify(task_queue.stats())
+
+@app.route('/api/ml/tasks/<task_id>', methods=['GET'])
+def task_status_endpoint(task_id):
+    """Status of a background task, with its result once finished"""
+    task = task_queue.get(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found"}), 404
+    task.pop('callbackUrl', None)
+    return jsonify(task)
+
+def iter_bulk_documents():
+    """Documents from an NDJSON body (read lazily) or multipart 'files' PDFs.
+    
+    Yields dicts with 'id' and either 'resumeText'/'resumeSkills' or an 'error'.
+    Multipart bodies are not streamed: the whole body (up to MAX_UPLOAD_MB) is
+    parsed here, before the response starts, so an oversized one is a 413
+    rather than an error in the middle of a 200 stream.
+    """
+    if request.mimetype == 'multipart/form-data':
+        return iter_uploaded_pdfs(request.files.getlist('files'))
+    return iter_ndjson_documents(request.stream)
+
+def iter_uploaded_pdfs(uploads):
+    for upload in uploads:
+        pdf_bytes = upload.read()
+        if not pdf_bytes.startswith(b'%PDF'):
+            yield {'id': upload.filename, 'error': "Uploaded file is not a PDF"}
+            continue
+        yield {'id': upload.filename, 'resumeText': cached_pdf_text(pdf_bytes)}
+
+def iter_ndjson_documents(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            document = json.loads(line)
+        except ValueError:
+            yield {'id': None, 'line': line_number, 'error': "Invalid JSON"}
+            continue
+        if not isinstance(document, dict):
+            yield {'id': None, 'line': line_number, 'error': "Each line must be a JSON object"}
+            continue
+        document.setdefault('id', line_number)
+        yield document
+
+def request_flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def mark_near_duplicates(documents, index):
+    """Tag documents that are near-duplicates of resumes already in index.
+    
+    Every document gets 'cacheKey', a hash of its text alone; near-duplicates
+    also get 'canonicalKey', 'duplicateOf' (the indexed resume's id) and
+    'similarity'. The others are added to the index as new canonical resumes.
+    Keys carry no taxonomy or model version, so results looked up through
+    them must be keyed by the current versions too (see dedup_parse_key).
+    """
+    for document in documents:
+        text = document['resumeText']
+        document['cacheKey'] = cache_key('text', text)
+        signature = minhash_signature(text)
+        matches = index.query(signature)
+        if matches:
+            key, similarity, meta = matches[0]
+            document.update(canonicalKey=key, duplicateOf=meta['id'], similarity=round(similarity, 3))
+        else:
+            index.add(document['cacheKey'], signature, {'id': document['id']})
+
+def dedup_parse_key(content_key):
+    """Parse cache key for a near-duplicate index key under the current taxonomy and model"""
+    return cache_key('dedup-parse', content_key, (current_taxonomy().fingerprint, MODEL_VERSION, PARSER_VERSION))
+
+def resolve_near_duplicates(documents, index, compute, lookup, remember=None):
+    """Results for a batch where near-duplicates reuse their canonical resume's result.
+    
+    Canonical resumes are looked up in (and new ones added to) index.
+    compute(documents) returns one result per document; lookup(key) returns an
+    earlier result for a canonical cache key, or None. Only documents whose
+    canonical result is neither known nor computed in this batch are computed.
+    """
+    mark_near_duplicates(documents, index)
+    results = [lookup(document['canonicalKey']) if 'canonicalKey' in document else None for document in documents]
+    
+    # One computation per canonical key: new resumes, plus the first near-duplicate
+    # of each canonical resume whose result is no longer known
+    todo = []
+    scheduled = {document['cacheKey'] for document in documents if 'canonicalKey' not in document}
+    for i, (document, result) in enumerate(zip(documents, results)):
+        if result is None and ('canonicalKey' not in document or document['canonicalKey'] not in scheduled):
+            todo.append(i)
+            scheduled.add(document.get('canonicalKey'))
+    
+    computed = {}
+    for i, result in zip(todo, compute([documents[i] for i in todo])):
+        key = documents[i].get('canonicalKey', documents[i]['cacheKey'])
+        results[i] = computed[key] = result
+        if remember is not None:
+            remember(key, result)
+    return [computed[documents[i]['canonicalKey']] if result is None else result
+            for i, result in enumerate(results)]
+
+def duplicate_fields(document):
+    if 'duplicateOf' not in document:
+        return {}
+    return {'duplicateOf': document['duplicateOf'], 'similarity': document['similarity']}
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def ndjson_response(lines):
+    """Stream one JSON document per line as results become ready"""
+    return Response(stream_with_context(json.dumps(line) + '\n' for line in lines),
+                    mimetype='application/x-ndjson')
+
+def stream_bulk_results(documents, process_batch):
+    """Run process_batch over valid documents batch by batch, then emit a summary line"""
+    count = errors = 0
+    for batch in batched(documents, BULK_BATCH_SIZE):
+        # A deadline (only when the client sent one) ends the stream between batches
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            SHED_TOTAL.inc(reason='deadline')
+            yield {'error': "Request deadline exceeded", 'summary': {'count': count, 'errors': errors}}
+            return
+        valid = []
+        for document in batch:
+            if 'error' in document:
+                pass
+            elif not isinstance(document.get('resumeText'), str) or not document['resumeText'].strip():
+                document = {'id': document.get('id'), 'error': "Missing resumeText"}
+            else:
+                valid.append(document)
+                continue
+            count += 1
+            errors += 1
+            yield document
+        
+        try:
+            for result in process_batch(valid):
+                count += 1
+                errors += 'error' in result
+                yield result
+        except DeadlineExceeded:
+            SHED_TOTAL.inc(reason='deadline')
+            yield {'error': "Request deadline exceeded", 'summary': {'count': count, 'errors': errors}}
+            return
+    
+    yield {'summary': {'count': count, 'errors': errors}}
+
+@app.route('/api/ml/bulk/parse', methods=['POST'])
+def bulk_parse_endpoint():
+    """Parse a stream of resumes, answering with one NDJSON line per document.
+    
+    The body is NDJSON ({"id", "resumeText"} per line) or multipart PDFs under
+    'files'. Only NDJSON is read incrementally, so it is not bounded by
+    MAX_UPLOAD_MB; a multipart body is received in full (up to MAX_UPLOAD_MB)
+    before the first line is sent. Lines omit
+    rawText, since the caller already has the text. With ?dedup=1,
+    near-duplicates of already seen resumes reuse their parse result and carry
+    'duplicateOf' and 'similarity'.
+    """
+    dedup = request_flag('dedup')
+    
+    def parse_documents(documents):
+        return cached_parse_batch([document['resumeText'] for document in documents])
+    
+    def lookup(key):
+        return parse_cache.get(dedup_parse_key(key))
+    
+    def remember(key, results):
+        if 'error' not in results:
+            parse_cache.set(dedup_parse_key(key), results)
+    
+    def process_batch(documents):
+        if dedup:
+            parsed = resolve_near_duplicates(documents, near_duplicate_index, parse_documents, lookup, remember)
+        else:
+            parsed = parse_documents(documents)
+        for document, results in zip(documents, parsed):
+            if 'error' in results:
+                yield {'id': document['id'], 'error': results['error']}
+                continue
+            entry = {
+                'id': document['id'],
+                'skills': results.get('skills', []),
+                'experience': results.get('experience', 'Not specified'),
+                'education': results.get('education', ['Not specified']),
+                'textLength': len(document['resumeText'])
+            }
+            entry.update(duplicate_fields(document))
+            yield entry
+    
+    return ndjson_response(stream_bulk_results(iter_bulk_documents(), process_batch))
+
+@app.route('/api/ml/bulk/match', methods=['POST'])
+def bulk_match_endpoint():
+    """Match a stream of resumes against one job, one NDJSON line per resume.
+    
+    The job comes from the query string (jobText, jobSkills comma separated) or
+    from an NDJSON first line holding "jobText"; resumes follow as
+    {"id", "resumeText", "resumeSkills"} lines or multipart PDFs under 'files'
+    (not streamed: received in full, up to MAX_UPLOAD_MB, before matching starts).
+    With ?dedup=1, near-duplicates of resumes matched earlier in the same
+    request reuse that result and carry 'duplicateOf' and 'similarity'.
+    """
+    documents = iter_bulk_documents()
+    dedup = request_flag('dedup')
+    # Resumes and match results of this request only: results depend on this
+    # request's job, and other requests' resumes must not show up as duplicateOf
+    dedup_index = NearDuplicateIndex(near_duplicate_index.threshold, near_duplicate_index.max_entries,
+                                     near_duplicate_index.bands)
+    matched = {}
+    job_text = request.args.get('jobText', '')
+    job_skills = [skill for skill in request.args.get('jobSkills', '').split(',') if skill.strip()]
+    skill_weights = None
+    
+    if not job_text:
+        if request.mimetype == 'multipart/form-data':
+            job_text = request.form.get('jobText', '')
+            job_skills = [skill for skill in request.form.get('jobSkills', '').split(',') if skill.strip()]
+        else:
+            header = next(documents, {})
+            job_text = header.get('jobText', '')
+            job_skills = header.get('jobSkills', [])
+            skill_weights = header.get('skillWeights')
+    
+    if not job_text:
+        return jsonify({"error": "Missing job text"}), 400
+    if skill_weights_error(skill_weights):
+        return jsonify({"error": skill_weights_error(skill_weights)}), 400
+    observe_document('job', job_text)
+    
+    def match_documents(documents):
+        batch = [{
+            'id': document['id'],
+            'text': document['resumeText'],
+            'skills': document.get('resumeSkills', [])
+        } for document in documents]
+        results = cpu_pool.run(rank_resumes, job_text, job_skills, batch, skill_weights, sort=False)
+        if 'error' in results:
+            return [{'error': "Failed to calculate match"} for _ in documents]
+        return [format_match_result(result) for result in results['results']]
+    
+    def remember(key, entry):
+        if 'error' not in entry and len(matched) < dedup_index.max_entries:
+            matched[key] = entry
+    
+    def process_batch(documents):
+        for document in documents:
+            observe_document('resume', document['resumeText'])
+        if dedup:
+            entries = resolve_near_duplicates(documents, dedup_index, match_documents, matched.get, remember)
+        else:
+            entries = match_documents(documents)
+        for document, entry in zip(documents, entries):
+            entry = dict(entry, id=document['id'])
+            entry.update(duplicate_fields(document))
+            yield entry
+    
+    return ndjson_response(stream_bulk_results(documents, process_batch))
+
+@app.route('/api/ml/dedup', methods=['POST'])
+def dedup_endpoint():
+    """Find near-duplicates of resumes among those seen before (and earlier in the request).
+    
+    Resumes that are not duplicates are added to the index unless "register"
+    is false. The index is per worker process, so "seen before" means by the
+    worker answering this request.
+    """
+    try:
+        data = request.get_json()
+        resumes = data.get('resumes', [])
+        register = data.get('register', True)
+        
+        if not isinstance(resumes, list) or not resumes:
+            return jsonify({"error": "Missing resumes"}), 400
+        if len(resumes) > MAX_RANK_BATCH:
+            return jsonify({"error": f"Too many resumes (max {MAX_RANK_BATCH})"}), 400
+        if any(not isinstance(resume, dict) or not resume.get('resumeText') for resume in resumes):
+            return jsonify({"error": "Each resume needs resumeText"}), 400
+        
+        results = []
+        for resume in resumes:
+            signature = minhash_signature(resume['resumeText'])
+            matches = near_duplicate_index.query(signature)
+            if not matches and register:
+                near_duplicate_index.add(cache_key('text', resume['resumeText']), signature, {'id': resume.get('id')})
+            results.append({
+                'id': resume.get('id'),
+                'duplicateOf': matches[0][2]['id'] if matches else None,
+                'matches': [{'id': meta['id'], 'similarity': round(similarity, 3)}
+                            for _, similarity, meta in matches[:10]]
+            })
+        
+        return jsonify({
+            'results': results,
+            'duplicates': sum(result['duplicateOf'] is not None for result in results),
+            'indexSize': len(near_duplicate_index)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in dedup_endpoint: {e}")
+        return jsonify({"error": "Failed to check duplicates"}), 500
+
+@app.route('/api/ml/dedup/stats', methods=['GET'])
+def dedup_stats_endpoint():
+    """Near-duplicate index size and LSH settings"""
+    return jsonify(near_duplicate_index.stats())
+
+@app.route('/api/ml/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Stage latencies, request counters and document sizes in Prometheus text format"""
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/ml/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """Parse cache hit/miss/eviction counters"""
+    return jsonify(parse_cache.stats())
+
+def config_summary(taxonomy):
+    return {
+        'version': taxonomy.version,
+        'fingerprint': taxonomy.fingerprint,
+        'skills': len(taxonomy.skills),
+        'aliases': len(taxonomy.aliases),
+        'textWeight': taxonomy.text_weight,
+        'skillWeight': taxonomy.skill_weight
+    }
+
+@app.route('/api/ml/admin/config', methods=['GET'])
+def config_endpoint():
+    """Active skill taxonomy and scoring weights in this worker"""
+    return jsonify(config_summary(current_taxonomy()))
+
+@app.route('/api/ml/admin/reload-config', methods=['POST'])
+def reload_config_endpoint():
+    """Reload the skill taxonomy and scoring weights from their config file now.
+    
+    Applies to the worker handling the request; the others pick up the file
+    change through the watcher within CONFIG_POLL_SECONDS. An invalid file is
+    rejected and the current config stays active.
+    """
+    previous = current_taxonomy()
+    try:
+        taxonomy = taxonomy_reloader.reload()
+    except Exception as e:
+        logger.error(f"Error in reload_config_endpoint: {e}")
+        return jsonify({"error": f"Config not reloaded: {e}", 'version': previous.version}), 400
+    cpu_pool.restart()
+    logger.info(f"Skill taxonomy reloaded: {previous.version} -> {taxonomy.version}")
+    
+    response = config_summary(taxonomy)
+    response['previousVersion'] = previous.version
+    response['changed'] = taxonomy.fingerprint != previous.fingerprint
+    return jsonify(response)
+
+@app.route('/api/ml/admission/stats', methods=['GET'])
+def admission_stats_endpoint():
+    """In-flight, queued and shed request counters for this worker"""
+    return jsonify(admission.stats())
+
 if __name__ == '__main__':
     # Create uploads directory if it doesn't exist
     os.makedirs('uploads', exist_ok=True)
@@ -130,5 +1059,7 @@ if __name__ == '__main__':
     # Get port from environment or default to 5000
     port = int(os.environ.get('PORT', 5000))
     
+    warm_up()
     logger.info(f"Starting HireAI ML Engine on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Development server only; production runs gunicorn --config gunicorn.conf.py app:app
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
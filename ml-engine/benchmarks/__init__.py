@@ -0,0 +1 @@
+"""Offline performance benchmarks for the ML engine (see benchmarks.run)"""
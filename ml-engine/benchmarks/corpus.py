@@ -0,0 +1,121 @@
+import random
+
+# Fixed vocabularies so the corpus does not change when the skill taxonomy does
+TECH_SKILLS = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'C++', 'C#', 'Ruby', 'PHP', 'Kotlin', 'Scala',
+    'React', 'Angular', 'Vue', 'Node.js', 'Django', 'Flask', 'FastAPI', 'Spring Boot', 'Rails', 'Express',
+    'SQL', 'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Elasticsearch', 'Cassandra', 'DynamoDB',
+    'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes', 'Terraform', 'Jenkins', 'CI/CD', 'Ansible',
+    'Machine Learning', 'Deep Learning', 'TensorFlow', 'PyTorch', 'Pandas', 'NumPy', 'scikit-learn',
+    'GraphQL', 'REST', 'Microservices', 'Linux', 'Git', 'Kafka', 'Spark', 'Airflow', 'Snowflake'
+]
+SOFT_SKILLS = ['leadership', 'communication', 'teamwork', 'problem solving', 'time management',
+               'attention to detail', 'project management', 'critical thinking']
+TITLES = ['Software Engineer', 'Backend Developer', 'Data Engineer', 'Full Stack Developer', 'DevOps Engineer',
+          'Machine Learning Engineer', 'Platform Engineer', 'Site Reliability Engineer']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Hooli', 'Stark Industries', 'Wayne Enterprises',
+             'Cyberdyne Systems', 'Soylent Analytics', 'Tyrell Data']
+VERBS = ['Built', 'Designed', 'Led', 'Migrated', 'Optimized', 'Maintained', 'Automated', 'Scaled', 'Shipped',
+         'Refactored']
+OBJECTS = ['a payments API', 'the data pipeline', 'an internal search service', 'the deployment platform',
+           'a recommendation engine', 'customer-facing dashboards', 'the event ingestion layer',
+           'a feature store', 'the billing system', 'an observability stack']
+OUTCOMES = ['cutting latency by {n}%', 'serving {n}k requests per second', 'reducing cloud spend by {n}%',
+            'supporting {n} million users', 'improving test coverage to {n}%', 'shrinking build times by {n}%']
+DEGREES = ['Bachelor of Science in Computer Science', 'Master of Science in Data Engineering',
+           'B.Tech in Information Technology', 'MBA in Technology Management', 'PhD in Machine Learning']
+SCHOOLS = ['State University', 'Institute of Technology', 'City College', 'Polytechnic University']
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Patel', 'Okafor', 'Kowalski', 'Silva', 'Nakamura', 'Haddad', 'Larsen']
+
+# Document sizes: (roles, bullets per role, skills listed)
+SIZES = {
+    'small': (1, 3, 6),
+    'medium': (3, 5, 12),
+    'large': (8, 8, 20),
+    'xlarge': (20, 10, 30)
+}
+
+def _bullet(rng, skills):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(10, 90))
+    return f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)} and {rng.choice(skills)}, {outcome}."
+
+def generate_resume(seed, size='medium'):
+    """A deterministic synthetic resume with summary, experience, education and skills sections"""
+    roles, bullets, skill_count = SIZES[size]
+    rng = random.Random(f"resume-{seed}-{size}")
+    skills = rng.sample(TECH_SKILLS, skill_count)
+    years = rng.randint(1, 15)
+    strengths = rng.sample(SOFT_SKILLS, 2)
+
+    lines = [
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        f"candidate{seed}@example.com | +1 555 {rng.randint(1000000, 9999999)}",
+        "Summary",
+        f"{rng.choice(TITLES)} with {years} years of experience in {', '.join(skills[:3])}. "
+        f"Known for {strengths[0]} and {strengths[1]}.",
+        "Experience"
+    ]
+    for role in range(roles):
+        start = 2024 - role * 2 - rng.randint(1, 2)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {start + 2})")
+        lines.extend(_bullet(rng, skills) for _ in range(bullets))
+    lines.append("Education")
+    lines.append(f"{rng.choice(DEGREES)}, {rng.choice(SCHOOLS)}, {2024 - years - 4}")
+    lines.append("Skills")
+    lines.append(', '.join(skills + strengths))
+    return '\n'.join(lines)
+
+def generate_job(seed, size='medium'):
+    """A deterministic synthetic job description; returns (text, required skills)"""
+    roles, bullets, skill_count = SIZES[size]
+    rng = random.Random(f"job-{seed}-{size}")
+    skills = rng.sample(TECH_SKILLS, max(3, skill_count // 2))
+    title = rng.choice(TITLES)
+
+    lines = [
+        f"{title} at {rng.choice(COMPANIES)}",
+        f"We are looking for a {title.lower()} with {rng.randint(2, 8)}+ years of experience.",
+        "Responsibilities:"
+    ]
+    lines.extend(_bullet(rng, skills) for _ in range(roles * bullets))
+    lines.append("Requirements:")
+    lines.extend(f"- Hands-on experience with {skill}" for skill in skills)
+    lines.append("- Strong {} and {}".format(*rng.sample(SOFT_SKILLS, 2)))
+    return '\n'.join(lines), [skill.lower() for skill in skills]
+
+def paginate(text, lines_per_page=45):
+    """Split text into pages of lines for make_pdf"""
+    lines = text.splitlines()
+    return [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+
+def make_pdf(pages):
+    """Build a minimal PDF with one text page per list of lines"""
+    def escape(line):
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None,
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for lines in pages:
+        stream = 'BT /F1 11 Tf 14 TL 50 750 Td ' + ' '.join(f'({escape(line)}) Tj T*' for line in lines) + ' ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        page_ids.append(len(objects))
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(f"{i} 0 R" for i in page_ids)}] /Count {len(page_ids)} >>'
+    
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    return out
+
+def generate_resume_pdf(seed, size='medium'):
+    """The synthetic resume rendered as PDF bytes"""
+    return make_pdf(paginate(generate_resume(seed, size)))
@@ -0,0 +1,313 @@
+"""Benchmark the ML engine functions and endpoints on a synthetic corpus.
+
+Run from the ml-engine directory:
+
+    python -m benchmarks.run                       # full run, compared against benchmarks/baseline.json
+    python -m benchmarks.run --quick --filter parse
+    python -m benchmarks.run --save-baseline       # record this machine's numbers as the baseline
+
+Results are written as JSON; the exit status is 1 when any benchmark is
+slower than the baseline by more than the tolerance, or has no baseline
+numbers at all. Commit a regenerated baseline with every new benchmark.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import logging
+
+from benchmarks.corpus import SIZES, generate_job, generate_resume, generate_resume_pdf
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Slowdowns smaller than this many milliseconds are treated as noise
+MIN_REGRESSION_MS = 0.5
+# Resumes per request on the batch endpoints
+BATCH_DOCUMENTS = 20
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(latencies, wall_seconds, documents_per_op=1):
+    """Latency percentiles in milliseconds and throughput per second"""
+    summary = {
+        'iterations': len(latencies),
+        'opsPerSec': round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        'meanMs': round(1000 * sum(latencies) / len(latencies), 3),
+        'p50Ms': round(1000 * percentile(latencies, 0.50), 3),
+        'p95Ms': round(1000 * percentile(latencies, 0.95), 3),
+        'p99Ms': round(1000 * percentile(latencies, 0.99), 3)
+    }
+    if documents_per_op > 1:
+        summary['docsPerSec'] = round(summary['opsPerSec'] * documents_per_op, 2)
+    return summary
+
+def measure(prepare, call, iterations, warmup=2, documents_per_op=1):
+    """Time call(prepare(i)) per iteration; inputs are built before timing starts.
+    
+    Warm-up calls use negative i so they never share inputs with measured calls.
+    """
+    for i in range(1, warmup + 1):
+        call(prepare(-i))
+    payloads = [prepare(i) for i in range(iterations)]
+    latencies = []
+    started = time.perf_counter()
+    for payload in payloads:
+        call_started = time.perf_counter()
+        call(payload)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started, documents_per_op)
+
+class Benchmark:
+    """One named measurement: call(prepare(i)) repeated ``iterations`` times"""
+
+    def __init__(self, name, prepare, call, iterations, documents_per_op=1):
+        self.name = name
+        self.prepare = prepare
+        self.call = call
+        self.iterations = iterations
+        self.documents_per_op = documents_per_op
+
+    def run(self):
+        return measure(self.prepare, self.call, self.iterations, documents_per_op=self.documents_per_op)
+
+def _require(value):
+    if not value:
+        raise RuntimeError("Benchmark call returned an empty result")
+    return value
+
+def _check(response, expected=200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.path} returned {response.status_code}: {response.data[:200]!r}")
+    return response
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+
+def function_benchmarks(iterations):
+    """parse_resume_text, calculate_match_score (with and without jobId) and extract_text_from_pdf at every corpus size"""
+    from nlp_processor import calculate_match_score, extract_text_from_pdf, parse_resume_text
+
+    benchmarks = []
+    for size in SIZES:
+        job_text, job_skills = generate_job(0, size)
+        count = max(5, iterations // 4) if size == 'xlarge' else iterations
+        benchmarks.extend([
+            Benchmark(f'parse_resume_text[{size}]', lambda i, size=size: generate_resume(i, size),
+                      parse_resume_text, count),
+            Benchmark(f'calculate_match_score[{size}]', lambda i, size=size: generate_resume(i, size),
+                      lambda text, job_text=job_text, job_skills=job_skills:
+                      calculate_match_score(text, job_text, job_skills), count),
+            Benchmark(f'calculate_match_score_job_id[{size}]', lambda i, size=size: generate_resume(i, size),
+                      lambda text, job_text=job_text, job_skills=job_skills, size=size:
+                      calculate_match_score(text, job_text, job_skills, job_id=f'bench-{size}'), count),
+            Benchmark(f'extract_text_from_pdf[{size}]', lambda i, size=size: generate_resume_pdf(i, size),
+                      lambda pdf: _require(extract_text_from_pdf(pdf, workers=1)), count)
+        ])
+    benchmarks.append(Benchmark('extract_text_from_pdf_parallel[xlarge]',
+                                lambda i: generate_resume_pdf(i, 'xlarge'),
+                                lambda pdf: _require(extract_text_from_pdf(pdf)), max(5, iterations // 4)))
+    return benchmarks
+
+def endpoint_benchmarks(iterations):
+    """Every Flask endpoint through the test client"""
+    from app import app, job_registry, resume_index
+    from nlp_processor import warm_up
+
+    warm_up()
+    client = app.test_client()
+    job_text, job_skills = generate_job(0, 'medium')
+    batch_iterations = max(5, iterations // 4)
+
+    def get(path):
+        return lambda payload: _check(client.get(path.format(payload)))
+
+    def delete(path):
+        return lambda payload: _check(client.delete(path.format(payload)))
+
+    def post_json(path, expected=200):
+        return lambda body: _check(client.post(path, data=json.dumps(body), content_type='application/json'),
+                                   expected)
+
+    def post(path, content_type):
+        return lambda body: _check(client.post(path, data=body, content_type=content_type))
+
+    def batch(i, prefix):
+        return [{'id': f'{prefix}-{i}-{j}', 'resumeText': generate_resume(i * BATCH_DOCUMENTS + j, 'medium')}
+                for j in range(BATCH_DOCUMENTS)]
+
+    def ndjson(lines):
+        return '\n'.join(json.dumps(line) for line in lines)
+
+    # Fixtures for the read and delete endpoints
+    resume_index.add((f'pool-{i}', generate_resume(10000 + i, 'medium')) for i in range(200))
+    for i in range(-2, iterations):
+        resume_index.add([(f'delete-{i}', generate_resume(20000 + i, 'small'))])
+        job_registry.register(f'delete-{i}', *generate_job(i, 'small'))
+    for i in range(20):
+        job_registry.register(f'open-{i}', *generate_job(100 + i, 'medium'))
+    task_id = post_json('/api/ml/tasks/parse-resume', 202)({'resume_text': generate_resume(0, 'small')}) \
+        .get_json()['taskId']
+
+    def same(value):
+        return lambda i: value
+
+    return [
+        Benchmark('GET /api/ml/health', same(None), get('/api/ml/health'), iterations),
+        Benchmark('GET /api/ml/ready', same(None), get('/api/ml/ready'), iterations),
+        Benchmark('GET /api/ml/metrics', same(None), get('/api/ml/metrics'), iterations),
+        Benchmark('POST /api/ml/parse-resume[text]', lambda i: {'resume_text': generate_resume(i, 'medium')},
+                  post_json('/api/ml/parse-resume'), iterations),
+        Benchmark('POST /api/ml/parse-resume[pdf]', lambda i: generate_resume_pdf(i, 'medium'),
+                  post('/api/ml/parse-resume', 'application/pdf'), iterations),
+        Benchmark('POST /api/ml/calculate-match',
+                  lambda i: {'resumeText': generate_resume(i, 'medium'), 'jobText': job_text, 'jobSkills': job_skills},
+                  post_json('/api/ml/calculate-match'), iterations),
+        Benchmark('POST /api/ml/rank',
+                  lambda i: {'jobText': job_text, 'jobSkills': job_skills, 'resumes': batch(i, 'rank')},
+                  post_json('/api/ml/rank'), batch_iterations, BATCH_DOCUMENTS),
+        Benchmark('POST /api/ml/shortlist',
+                  lambda i: {'jobText': job_text, 'jobSkills': job_skills, 'resumes': batch(i, 'shortlist'), 'k': 3},
+                  post_json('/api/ml/shortlist'), batch_iterations, BATCH_DOCUMENTS),
+        Benchmark('POST /api/ml/analyze-job', lambda i: {'jobText': generate_job(i, 'medium')[0], 'jobId': f'bench-{i}'},
+                  post_json('/api/ml/analyze-job'), iterations),
+        Benchmark('POST /api/ml/index/resumes', lambda i: {'resumes': batch(i, 'index')},
+                  post_json('/api/ml/index/resumes'), batch_iterations, BATCH_DOCUMENTS),
+        Benchmark('DELETE /api/ml/index/resumes/<id>', lambda i: i,
+                  delete('/api/ml/index/resumes/delete-{}'), iterations),
+        Benchmark('GET /api/ml/index/stats', same(None), get('/api/ml/index/stats'), iterations),
+        Benchmark('POST /api/ml/search', same({'jobText': job_text, 'k': 10}), post_json('/api/ml/search'), iterations),
+        Benchmark('POST /api/ml/recommend-jobs', lambda i: {'resumeText': generate_resume(i, 'medium'), 'k': 5},
+                  post_json('/api/ml/recommend-jobs'), iterations),
+        Benchmark('DELETE /api/ml/jobs/<id>', lambda i: i, delete('/api/ml/jobs/delete-{}'), iterations),
+        Benchmark('POST /api/ml/tasks/parse-resume', lambda i: {'resume_text': generate_resume(i, 'small')},
+                  post_json('/api/ml/tasks/parse-resume', 202), iterations),
+        Benchmark('GET /api/ml/tasks/stats', same(None), get('/api/ml/tasks/stats'), iterations),
+        Benchmark('GET /api/ml/tasks/<id>', same(task_id), get('/api/ml/tasks/{}'), iterations),
+        Benchmark('POST /api/ml/bulk/parse', lambda i: ndjson(batch(i, 'bulk')),
+                  post('/api/ml/bulk/parse', 'application/x-ndjson'), batch_iterations, BATCH_DOCUMENTS),
+        Benchmark('POST /api/ml/bulk/match',
+                  lambda i: ndjson([{'jobText': job_text, 'jobSkills': job_skills}] + batch(i, 'bulk-match')),
+                  post('/api/ml/bulk/match', 'application/x-ndjson'), batch_iterations, BATCH_DOCUMENTS),
+        Benchmark('POST /api/ml/dedup', lambda i: {'resumes': batch(i, 'dedup')},
+                  post_json('/api/ml/dedup'), batch_iterations, BATCH_DOCUMENTS),
+        Benchmark('GET /api/ml/dedup/stats', same(None), get('/api/ml/dedup/stats'), iterations),
+        Benchmark('GET /api/ml/cache/stats', same(None), get('/api/ml/cache/stats'), iterations),
+        Benchmark('GET /api/ml/jobs/cache/stats', same(None), get('/api/ml/jobs/cache/stats'), iterations),
+        Benchmark('GET /api/ml/admission/stats', same(None), get('/api/ml/admission/stats'), iterations),
+        Benchmark('GET /api/ml/admin/config', same(None), get('/api/ml/admin/config'), iterations),
+        Benchmark('POST /api/ml/admin/reload-config', same(None),
+                  lambda payload: _check(client.post('/api/ml/admin/reload-config')), iterations)
+    ]
+
+# ── Baseline comparison ───────────────────────────────────────────────────────
+
+def compare(results, baseline, tolerance, metrics=('p50Ms', 'p95Ms')):
+    """Benchmarks whose latency percentiles grew by more than ``tolerance`` (a fraction).
+
+    Benchmarks the baseline does not know are skipped; see missing_from_baseline.
+    """
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        for metric in metrics:
+            before, after = previous[metric], current[metric]
+            if after > before * (1 + tolerance) and after - before > MIN_REGRESSION_MS:
+                regressions.append({
+                    'benchmark': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change': round(after / before - 1, 3) if before else None
+                })
+    return regressions
+
+def missing_from_baseline(results, baseline):
+    """Benchmarks in the results that the baseline has no numbers for"""
+    known = baseline.get('benchmarks', {})
+    return [name for name in results['benchmarks'] if name not in known]
+
+def run(iterations, name_filter=None):
+    from parse_cache import ParseCache
+    import app as app_module
+
+    # Measure the work itself, not parse cache hits from earlier benchmarks
+    app_module.parse_cache = ParseCache(max_entries=0)
+
+    results = {}
+    for group in (function_benchmarks, endpoint_benchmarks):
+        for benchmark in group(iterations):
+            if name_filter and name_filter not in benchmark.name:
+                continue
+            summary = results[benchmark.name] = benchmark.run()
+            print(f"{benchmark.name:<45} {summary['opsPerSec']:>10.1f}/s  p50 {summary['p50Ms']:>9.2f}ms  "
+                  f"p95 {summary['p95Ms']:>9.2f}ms  p99 {summary['p99Ms']:>9.2f}ms")
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpuCount': os.cpu_count(),
+            'iterations': iterations
+        },
+        'benchmarks': results
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50, help='calls per benchmark (default 50)')
+    parser.add_argument('--quick', action='store_true', help='10 iterations per benchmark')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--output', default='benchmark-results.json', help='where to write the results JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown as a fraction (default 0.25)')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to --baseline as well')
+    args = parser.parse_args(argv)
+
+    # Keep every store in memory and skip optional hooks so runs are reproducible;
+    # this must happen before the app is first imported
+    for name in ('PARSE_CACHE_DIR', 'RESUME_INDEX_DIR', 'JOB_INDEX_DIR', 'TASK_STORE_DIR', 'PROFILE_DIR'):
+        os.environ.pop(name, None)
+    os.environ['TASK_QUEUE_BACKEND'] = 'thread'
+    logging.disable(logging.WARNING)
+    results = run(10 if args.quick else args.iterations, args.filter)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    # With only 10 samples p95 is close to the maximum, so quick runs compare medians only
+    metrics = ('p50Ms',) if args.quick else ('p50Ms', 'p95Ms')
+    regressions = compare(results, baseline, args.tolerance, metrics)
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']} {regression['metric']}: "
+              f"{regression['baseline']}ms -> {regression['current']}ms")
+    # A benchmark without baseline numbers is never checked, so it fails the run
+    # until the baseline is regenerated with --save-baseline
+    missing = missing_from_baseline(results, baseline)
+    for name in missing:
+        print(f"MISSING FROM BASELINE {name}")
+    if not regressions and not missing:
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 1 if regressions or missing else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
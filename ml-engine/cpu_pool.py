@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from admission import DeadlineExceeded, check_deadline, clear_deadline, remaining_time
+
+logger = logging.getLogger(__name__)
+
+def _call(func, args, kwargs):
+    return func(*args, **kwargs)
+
+class CpuPool:
+    """Runs CPU-heavy stages (NER, TF-IDF scoring) in worker processes.
+
+    Request threads only wait on the result, so with a threaded server they
+    keep accepting and answering cheap requests while parsing is busy, and a
+    request whose deadline passes stops waiting (work still queued for it is
+    cancelled). ``workers=0`` runs stages inline, which is the default.
+    Functions must be module-level so they pickle, and anything they record
+    in process state (stage metrics, cProfile captures, the job artifact
+    cache) stays in the pool worker and is not visible to the web process.
+    """
+
+    def __init__(self, workers=0):
+        self.workers = workers
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Configured by CPU_POOL_WORKERS (per web worker process; 0 runs inline)"""
+        return cls(workers=int(os.environ.get('CPU_POOL_WORKERS', 0)))
+
+    def _get_executor(self):
+        with self._lock:
+            # Forked workers share the preloaded model; a pool inherited through
+            # fork belongs to the parent, so start our own
+            if self._executor is None or self._executor_pid != os.getpid():
+                method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method),
+                                                     initializer=clear_deadline)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def restart(self):
+        """Retire the current workers; the next call forks fresh ones.
+
+        Used after a config reload so that workers forked with the old
+        taxonomy stop taking work. Calls already running still finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if executor is not None and self._executor_pid == os.getpid():
+                executor.shutdown(wait=False)
+
+    def run(self, func, *args, **kwargs):
+        """func(*args, **kwargs), in a worker process when the pool is enabled.
+
+        Raises DeadlineExceeded if the calling request's deadline passes first.
+        """
+        check_deadline()
+        # Already inside a worker process (task queue, PDF pool): run inline
+        if self.workers <= 0 or multiprocessing.parent_process() is not None:
+            result = func(*args, **kwargs)
+            # func checks the deadline between documents; catch one that passed on its last step
+            check_deadline()
+            return result
+
+        future = self._get_executor().submit(_call, func, args, kwargs)
+        remaining = remaining_time()
+        try:
+            return future.result(timeout=None if remaining is None else max(0.0, remaining))
+        except FutureTimeoutError:
+            future.cancel()
+            raise DeadlineExceeded(f"Request deadline exceeded in {getattr(func, '__name__', func)}")
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); the next call starts a fresh pool
+            logger.error("CPU pool worker crashed; restarting pool")
+            with self._lock:
+                self._executor = None
+            raise
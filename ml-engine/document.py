@@ -0,0 +1,121 @@
+import re
+from collections import Counter
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from metrics import instrument_stage
+from segmentation import segment_sections
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# '+', '#' and '/' are kept so skills like c++, c# and ci/cd survive cleaning
+SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s\-\.\+#/]')
+# Same tokenization as scikit-learn's default token_pattern
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+@instrument_stage('clean_text')
+def clean_text(text):
+    """Clean and preprocess text"""
+    # Remove special characters and extra whitespace
+    text = SPECIAL_CHARS_PATTERN.sub(' ', text)
+    text = WHITESPACE_PATTERN.sub(' ', text)
+    return text.strip()
+
+class Document:
+    """A text with lazily computed, cached preprocessing stages.
+
+    Every extractor and the similarity code read from the same Document, so
+    cleaning, lowercasing and tokenization run at most once per text.
+    """
+
+    __slots__ = ('text', '_cleaned', '_lower', '_tokens', '_terms', '_term_counts', '_term_square_sum',
+                 '_sections', 'ner_doc')
+
+    def __init__(self, text):
+        self.text = text or ""
+        self._cleaned = None
+        self._lower = None
+        self._tokens = None
+        self._terms = None
+        self._term_counts = None
+        self._term_square_sum = None
+        self._sections = None
+        # spaCy doc, filled in by the NER stage
+        self.ner_doc = None
+
+    @property
+    def cleaned(self):
+        if self._cleaned is None:
+            self._cleaned = clean_text(self.text)
+        return self._cleaned
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = self.cleaned.lower()
+        return self._lower
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = TOKEN_PATTERN.findall(self.lower)
+        return self._tokens
+
+    @property
+    def terms(self):
+        """Stop-word filtered unigrams and bigrams, as TF-IDF would build them"""
+        if self._terms is None:
+            words = [token for token in self.tokens if token not in ENGLISH_STOP_WORDS]
+            self._terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return self._terms
+
+    @property
+    def term_counts(self):
+        """Term -> count over terms: the raw term frequencies TF-IDF starts from"""
+        if self._term_counts is None:
+            self._term_counts = Counter(self.terms)
+        return self._term_counts
+
+    @property
+    def term_square_sum(self):
+        """Sum of squared term counts, for vector norms"""
+        if self._term_square_sum is None:
+            self._term_square_sum = sum(count * count for count in self.term_counts.values())
+        return self._term_square_sum
+
+    @property
+    def sections(self):
+        """Section name -> Document, from header detection on the raw text"""
+        if self._sections is None:
+            self._sections = {name: Document(text) for name, text in segment_sections(self.text).items()}
+        return self._sections
+
+    def region(self, *names, required=None):
+        """The named sections as one Document, or the whole Document if none were found.
+
+        With ``required``, the whole Document is also returned when that section
+        is missing: the preamble before the first header counts as 'summary', so
+        a resume without the extractor's own section would otherwise only be
+        searched in its name and contact lines.
+        """
+        if required is not None and required not in self.sections:
+            return self
+        parts = [self.sections[name] for name in names if name in self.sections]
+        if not parts:
+            return self
+        if len(parts) == 1:
+            return parts[0]
+        return Document('\n'.join(part.text for part in parts))
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __len__(self):
+        return len(self.text)
+
+def as_document(text):
+    """Wrap a string in a Document, passing existing Documents through"""
+    return text if isinstance(text, Document) else Document(text)
+
+def document_terms(text):
+    """TF-IDF analyzer that reuses a Document's cached terms"""
+    return as_document(text).terms
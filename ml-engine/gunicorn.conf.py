@@ -0,0 +1,45 @@
+import gc
+import os
+import tempfile
+
+# Gunicorn settings for the ML engine: gunicorn --config gunicorn.conf.py app:app
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# Any worker can answer a task poll, a search or a recommendation, so task
+# records, the resume index and the job registry need shared stores
+if workers > 1:
+    os.environ.setdefault('TASK_STORE_DIR', os.path.join(tempfile.gettempdir(), 'ml-engine-tasks'))
+    os.environ.setdefault('RESUME_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'ml-engine-resume-index'))
+    os.environ.setdefault('JOB_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'ml-engine-job-index'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Threaded workers: each serves several requests at once, bounded by the app's
+# admission control (MAX_IN_FLIGHT running, MAX_QUEUE waiting, the rest get 429).
+# Queued requests hold a thread, so the defaults leave a quarter of the threads
+# free for health checks and fast rejections.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+os.environ.setdefault('MAX_IN_FLIGHT', str(max(1, threads // 4)))
+os.environ.setdefault('MAX_QUEUE', str(max(1, threads // 2)))
+# CPU_POOL_WORKERS > 0 moves parsing and scoring into processes outside the
+# threads' GIL. It stays off by default: stage histograms, profiles and the
+# job artifact cache would then live in those processes, out of reach of
+# /metrics, /debug/profiles, /jobs/cache/stats and DELETE /jobs/<id>.
+
+# Import the app (spaCy model, taxonomy, sklearn) once in the master; forked
+# workers share that memory copy-on-write instead of loading their own copy
+preload_app = True
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before any worker is forked"""
+    from nlp_processor import warm_up
+    warm_up()
+    # Keep the preloaded objects out of the collector so that GC passes in the
+    # workers do not touch (and copy) their shared pages
+    gc.freeze()
+
+def post_worker_init(worker):
+    """Warm up in the worker too when preloading is turned off (no-op otherwise)"""
+    from nlp_processor import warm_up
+    warm_up()
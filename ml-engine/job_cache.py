@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from document import as_document
+from parse_cache import cache_key
+from skill_taxonomy import current_taxonomy
+
+class JobArtifacts:
+    """Job-side inputs of a match, prepared once.
+
+    Holds the job Document with its cleaned text, terms and term counts
+    already computed, and the job skills with their canonical IDs, so
+    scoring a resume against it only processes the resume.
+    """
+
+    __slots__ = ('document', 'skills', 'canonical_skills', 'content_hash')
+
+    def __init__(self, job_text, job_skills, taxonomy=None, content_hash=None):
+        taxonomy = taxonomy or current_taxonomy()
+        self.document = as_document(job_text)
+        self.skills = list(job_skills or [])
+        self.canonical_skills = taxonomy.distinct_canonical(self.skills)
+        self.content_hash = content_hash
+
+    def prepare(self):
+        """Compute the cached text stages now rather than on first use"""
+        self.document.term_square_sum
+        return self
+
+def job_content_hash(job_text, job_skills, taxonomy):
+    """Hash of everything the artifacts depend on: text, skills and taxonomy"""
+    return cache_key('job', job_text, (json.dumps(list(job_skills or []), sort_keys=True), taxonomy.fingerprint))
+
+class JobArtifactCache:
+    """Bounded LRU of JobArtifacts by job ID.
+
+    Callers still send the job text and skills with each request; an entry is
+    reused only while their content hash (which includes the taxonomy
+    fingerprint) matches, and rebuilt otherwise. A changed posting or a
+    config reload therefore never scores against stale artifacts.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    @classmethod
+    def from_env(cls):
+        """Configured by JOB_CACHE_SIZE (0 disables caching)"""
+        return cls(max_entries=int(os.environ.get('JOB_CACHE_SIZE', 128)))
+
+    def get(self, job_id, job_text, job_skills, taxonomy=None):
+        """Artifacts for this job, from the cache when its content is unchanged"""
+        taxonomy = taxonomy or current_taxonomy()
+        content_hash = job_content_hash(job_text, job_skills, taxonomy)
+        key = str(job_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.content_hash == content_hash:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry
+            self._stats['invalidations' if entry is not None else 'misses'] += 1
+
+        # Built outside the lock; a concurrent build of the same job just wins or loses the store
+        entry = JobArtifacts(job_text, job_skills, taxonomy, content_hash).prepare()
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return entry
+
+    def remove(self, job_id):
+        with self._lock:
+            return self._entries.pop(str(job_id), None) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, job_id):
+        return str(job_id) in self._entries
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        stats['maxEntries'] = self.max_entries
+        return stats
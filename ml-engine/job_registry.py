@@ -0,0 +1,93 @@
+import logging
+
+import numpy as np
+
+from skill_taxonomy import current_taxonomy
+from vector_index import VectorIndex, top_k
+
+logger = logging.getLogger(__name__)
+
+class JobRegistry:
+    """Open jobs with precomputed vectors and skill sets for reverse matching"""
+
+    def __init__(self, index=None):
+        # An empty index is falsy (it has __len__), so test for None explicitly
+        self.index = index if index is not None else VectorIndex()
+
+    @classmethod
+    def from_env(cls):
+        """Build a registry persisted under JOB_INDEX_DIR when set (required with several web workers)"""
+        return cls(VectorIndex.from_env('JOB_INDEX'))
+
+    def register(self, job_id, job_text, job_skills):
+        """Add or update a job's vector and skill set"""
+        taxonomy = current_taxonomy()
+        skills = {}
+        for skill in job_skills or []:
+            if taxonomy.canonical(skill):
+                skills.setdefault(taxonomy.canonical(skill), skill)
+        self.index.add([(job_id, job_text, {
+            'skills': list(skills.values()),
+            'skillIds': list(skills),
+            'taxonomy': taxonomy.fingerprint
+        })])
+
+    def remove(self, job_id):
+        """Remove a job; returns True if it was registered"""
+        return self.index.remove([job_id]) > 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, job_id):
+        return job_id in self.index
+
+    def recommend(self, resume_text, resume_skills, k=10):
+        """Score one resume against every registered job and return the top-k"""
+        ids, similarities, live = self.index.score_all(resume_text)
+        if not live:
+            return []
+
+        # Same weighting as calculate_match_score, from the active config
+        taxonomy = current_taxonomy()
+        resume_set = {taxonomy.canonical(skill) for skill in resume_skills or []}
+        metas = self.index.get_metas(ids)
+
+        # Skill match percentage per job via set intersection
+        skill_scores = np.zeros(len(ids))
+        matches = [None] * len(ids)
+        for i, meta in enumerate(metas):
+            if meta is None or not np.isfinite(similarities[i]):
+                continue
+            job_skills = meta.get('skills', [])
+            skill_ids = meta.get('skillIds')
+            # IDs stored under an earlier taxonomy are recomputed
+            if not skill_ids or meta.get('taxonomy') != taxonomy.fingerprint:
+                skill_ids = [taxonomy.canonical(skill) for skill in job_skills]
+            matched = [skill for skill, skill_id in zip(job_skills, skill_ids) if skill_id in resume_set]
+            matches[i] = (matched, job_skills)
+            if job_skills:
+                skill_scores[i] = len(matched) / len(job_skills) * 100
+
+        alive = np.array([match is not None for match in matches], dtype=bool)
+        text_scores = np.where(alive, similarities, 0.0)
+        overall = np.floor(np.clip(text_scores * taxonomy.text_weight * 100 + skill_scores * taxonomy.skill_weight,
+                                   0, 100))
+        # Ties resolve towards higher text similarity; removed jobs never rank
+        ranking = np.where(alive, overall + np.clip(text_scores, 0, 1) * 1e-3, -np.inf)
+
+        results = []
+        for i in top_k(ranking, min(k, live)):
+            if matches[i] is None:
+                continue
+            matched, job_skills = matches[i]
+            matched_set = set(matched)
+            results.append({
+                'job_id': ids[i],
+                'match_score': int(overall[i]),
+                'matched_skills': matched,
+                'missing_skills': [skill for skill in job_skills if skill not in matched_set],
+                'text_similarity': round(float(similarities[i]) * 100, 2),
+                'skill_match_percentage': round(float(skill_scores[i]), 2)
+            })
+        return results
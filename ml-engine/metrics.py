@@ -0,0 +1,173 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Latency buckets in seconds, from sub-millisecond regex stages to multi-second PDFs
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Document size buckets in characters
+SIZE_BUCKETS = (500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+class Metric:
+    """Base for metrics keyed by a tuple of label values.
+
+    Values are kept per process; updates take one lock and a dict lookup,
+    so instrumentation stays cheap enough to leave on.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def samples(self):
+        """(suffix, label string, value) tuples in exposition order"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(f'{self.name}{suffix}{labels} {_format_value(value)}' for suffix, labels, value in self.samples())
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', self._format_labels(key), value) for key, value in values]
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', self._format_labels(key), value) for key, value in values]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts plus an overflow slot, then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(('_bucket', self._format_labels(key, [('le', _format_value(bound))]), cumulative))
+            cumulative += counts[-1]
+            samples.append(('_bucket', self._format_labels(key, [('le', '+Inf')]), cumulative))
+            samples.append(('_sum', self._format_labels(key), total))
+            samples.append(('_count', self._format_labels(key), cumulative))
+        return samples
+
+def _format_value(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+STAGE_SECONDS = Histogram('ml_stage_duration_seconds', 'Time spent in each processing stage', ['stage'])
+REQUESTS_TOTAL = Counter('ml_requests_total', 'HTTP requests handled', ['endpoint', 'method', 'status'])
+REQUEST_SECONDS = Histogram('ml_request_duration_seconds', 'HTTP request latency', ['endpoint'])
+REQUESTS_IN_FLIGHT = Gauge('ml_requests_in_flight', 'HTTP requests currently being handled', ['endpoint'])
+DOCUMENT_CHARS = Histogram('ml_document_size_chars', 'Size of submitted documents in characters', ['kind'],
+                           buckets=SIZE_BUCKETS)
+COALESCED_TOTAL = Counter('ml_requests_coalesced_total',
+                          'Requests answered from an identical request already in flight', ['endpoint'])
+SHED_TOTAL = Counter('ml_requests_shed_total',
+                     'Requests refused (busy) or cut short (deadline) by admission control', ['reason'])
+ADMISSION_QUEUE_DEPTH = Gauge('ml_admission_queue_depth', 'Requests waiting for an in-flight slot')
+
+REGISTRY = [STAGE_SECONDS, REQUESTS_TOTAL, REQUEST_SECONDS, REQUESTS_IN_FLIGHT, DOCUMENT_CHARS, COALESCED_TOTAL,
+            SHED_TOTAL, ADMISSION_QUEUE_DEPTH]
+
+def render_metrics():
+    """All registered metrics in the Prometheus text exposition format"""
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+class timed_stage:
+    """Record the duration of the enclosed block under the given stage.
+
+    A plain class rather than @contextmanager, which costs a generator per use.
+    """
+
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, stage=self.stage)
+        return False
+
+def instrument_stage(stage):
+    """Decorator form of timed_stage"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+        return wrapper
+    return decorator
+
+def observe_document(kind, text):
+    """Record the size of a submitted document"""
+    if text:
+        DOCUMENT_CHARS.observe(len(text), kind=kind)
@@ -0,0 +1,141 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from document import as_document
+from metrics import instrument_stage
+
+# Words per shingle
+SHINGLE_SIZE = 5
+# Hash functions per signature; split into BANDS bands of NUM_PERM // BANDS rows
+NUM_PERM = 128
+BANDS = 16
+
+# Multiply-shift hash parameters (odd multipliers). Fixed seed: signatures must
+# agree across processes and restarts.
+_random = np.random.RandomState(20240)
+_PERM_A = _random.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _random.randint(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+_SHIFT = np.uint64(32)
+# Signature of a text too short to shingle; matches nothing but itself
+_EMPTY_SIGNATURE = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+def shingles(text):
+    """Distinct word shingles of the cleaned, lowercased text"""
+    tokens = as_document(text).tokens
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+@instrument_stage('minhash')
+def minhash_signature(text):
+    """MinHash signature (NUM_PERM uint64 values) of a text's shingle set"""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return _EMPTY_SIGNATURE.copy()
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingle_set),
+                         dtype=np.uint64, count=len(shingle_set))
+    # One universal hash per row, ((a * x + b) mod 2^64) >> 32, minimised over the shingles
+    permuted = np.multiply.outer(_PERM_A, hashes)
+    permuted += _PERM_B[:, None]
+    permuted >>= _SHIFT
+    return permuted.min(axis=1)
+
+def estimate_similarity(signature, other):
+    """Estimated Jaccard similarity of the two shingle sets"""
+    return float(np.count_nonzero(signature == other)) / len(signature)
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures for near-duplicate lookup.
+
+    Each signature is split into bands; documents sharing any band bucket are
+    candidates, and candidates are kept if their estimated Jaccard similarity
+    reaches ``threshold``. Lookups touch only the matching buckets, not the
+    whole pool. The oldest entries are dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, threshold=0.85, max_entries=100000, bands=BANDS):
+        if NUM_PERM % bands:
+            raise ValueError(f"bands must divide {NUM_PERM}")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._signatures = OrderedDict()
+        self._meta = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Configured by DEDUP_THRESHOLD and DEDUP_MAX_ENTRIES"""
+        return cls(
+            threshold=float(os.environ.get('DEDUP_THRESHOLD', 0.85)),
+            max_entries=int(os.environ.get('DEDUP_MAX_ENTRIES', 100000))
+        )
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key, signature, meta=None):
+        """Index a signature under key, replacing any earlier entry for it"""
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+            self._signatures[key] = signature
+            self._meta[key] = meta
+            for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(band_key, set()).add(key)
+            while len(self._signatures) > self.max_entries:
+                self._remove(next(iter(self._signatures)))
+
+    def _remove(self, key):
+        signature = self._signatures.pop(key)
+        self._meta.pop(key, None)
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+                return True
+            return False
+
+    def query(self, signature):
+        """(key, similarity, meta) of indexed near-duplicates, most similar first"""
+        with self._lock:
+            candidates = set()
+            for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(band_key, ()))
+            matches = []
+            for key in candidates:
+                similarity = estimate_similarity(signature, self._signatures[key])
+                if similarity >= self.threshold:
+                    matches.append((key, similarity, self._meta[key]))
+        matches.sort(key=lambda match: (-match[1], str(match[0])))
+        return matches
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._signatures),
+                'maxEntries': self.max_entries,
+                'threshold': self.threshold,
+                'bands': self.bands,
+                'rows': self.rows,
+                'buckets': sum(len(buckets) for buckets in self._buckets)
+            }
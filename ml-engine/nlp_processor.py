@@ -1,131 +1,167 @@
-import spacy
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pdfplumber
+from pdf_extraction import extract_pdf_text
+import numpy as np
+import math
 import os
 import re
+import time
+import heapq
 import logging
 from collections import Counter
+from skill_taxonomy import current_taxonomy
+from job_cache import JobArtifacts, JobArtifactCache
+from document import as_document, document_terms
+from metrics import instrument_stage, timed_stage
+from admission import DeadlineExceeded, check_deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# spaCy model used for NER; it is installed at build time, never downloaded at runtime.
+# An empty value skips spaCy entirely (keyword skill matching only).
+SPACY_MODEL = os.environ.get('SPACY_MODEL', 'en_core_web_sm')
+
 # Load spaCy model with error handling
 def load_spacy_model():
+    if not SPACY_MODEL:
+        return None
     try:
-        return spacy.load("en_core_web_sm")
-    except OSError:
-        logger.warning("spaCy model 'en_core_web_sm' not found. Attempting to download...")
-        try:
-            import subprocess
-            subprocess.check_call(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            return spacy.load("en_core_web_sm")
-        except Exception as e:
-            logger.error(f"Failed to download spaCy model: {e}")
-            return None
+        import spacy
+        return spacy.load(SPACY_MODEL)
+    except (ImportError, OSError) as e:
+        logger.warning(f"spaCy model '{SPACY_MODEL}' is not available, NER skill extraction is disabled "
+                       f"(install it with: python -m spacy download {SPACY_MODEL}): {e}")
+        return None
 
 # Initialize NLP model
 nlp = load_spacy_model()
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using pdfplumber"""
+# Identifies the NER model and the extraction logic in cache keys
+MODEL_VERSION = f"{nlp.meta.get('name')}-{nlp.meta.get('version')}" if nlp else "none"
+PARSER_VERSION = "3"
+
+# Preprocessed job postings for repeated matching against the same jobId
+job_artifacts = JobArtifactCache.from_env()
+
+# NER batch settings for nlp.pipe
+SPACY_BATCH_SIZE = int(os.environ.get('SPACY_BATCH_SIZE', 32))
+SPACY_N_PROCESS = int(os.environ.get('SPACY_N_PROCESS', 1))
+# Entities are only read from the start of long documents
+NER_MAX_CHARS = int(os.environ.get('NER_MAX_CHARS', 20000))
+# Pipeline components that are not needed to produce doc.ents
+NER_UNUSED_PIPES = ('tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter')
+
+@instrument_stage('pdf_extract')
+def extract_text_from_pdf(pdf_path, max_pages=None, timeout=None, workers=None):
+    """Extract text from PDF using pdfplumber (accepts a path, bytes or a binary file object).
+    
+    Pages are split across worker processes, capped at ``max_pages`` and
+    bounded by a per-document ``timeout``; see pdf_extraction for defaults.
+    """
     try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text.strip()
+        return extract_pdf_text(pdf_path, max_pages=max_pages, timeout=timeout, workers=workers)
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         return ""
 
-def clean_text(text):
-    """Clean and preprocess text"""
-    # Remove extra whitespace and special characters
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[^\w\s\-\.]', ' ', text)
-    return text.strip()
+def _ner_disabled_pipes():
+    """Pipes to disable when only named entities are needed"""
+    return [name for name in NER_UNUSED_PIPES if name in nlp.pipe_names]
 
-def extract_skills(text):
-    """Extract skills from text using keyword matching and NLP"""
-    if not text:
-        return []
-    
-    text_lower = text.lower()
-    
-    # Comprehensive skill database
-    technical_skills = [
-        # Programming Languages
-        "python", "java", "javascript", "typescript", "c++", "c#", "php", "ruby", "go", "rust", "swift", "kotlin", "scala", "r",
-        
-        # Web Technologies
-        "html", "css", "react", "angular", "vue", "svelte", "jquery", "bootstrap", "tailwind", "sass", "less",
-        "node.js", "nodejs", "express", "fastapi", "django", "flask", "spring", "laravel", "rails",
-        
-        # Databases
-        "sql", "mysql", "postgresql", "mongodb", "redis", "elasticsearch", "cassandra", "dynamodb", "sqlite",
-        
-        # Cloud & DevOps
-        "aws", "azure", "gcp", "docker", "kubernetes", "jenkins", "gitlab", "github", "ci/cd", "terraform", "ansible",
-        
-        # Data Science & ML
-        "machine learning", "deep learning", "data science", "tensorflow", "pytorch", "pandas", "numpy", "scikit-learn",
-        "tableau", "power bi", "jupyter", "matplotlib", "seaborn",
-        
-        # Other Technologies
-        "git", "linux", "unix", "bash", "api", "rest", "graphql", "microservices", "agile", "scrum", "testing", "qa"
-    ]
-    
-    soft_skills = [
-        "leadership", "communication", "teamwork", "problem solving", "critical thinking", "creativity",
-        "time management", "project management", "analytical thinking", "attention to detail"
-    ]
-    
-    all_skills = technical_skills + soft_skills
-    found_skills = []
-    
-    # Extract skills using keyword matching
-    for skill in all_skills:
-        if skill in text_lower:
-            found_skills.append(skill)
+def _add_entity_skills(doc, found_skills, seen_skills):
+    """Add ORG/PRODUCT entities from a spaCy doc as skill candidates"""
+    for ent in doc.ents:
+        if ent.label_ in ['ORG', 'PRODUCT'] and len(ent.text) > 2:
+            skill_candidate = ent.text.lower().strip()
+            if skill_candidate not in seen_skills and len(skill_candidate) < 20:
+                seen_skills.add(skill_candidate)
+                found_skills.append(skill_candidate)
+
+def run_ner(documents, batch_size=None, n_process=None):
+    """Fill in the spaCy doc of every Document that lacks one, via one nlp.pipe stream"""
+    if not nlp:
+        return
+    batch_size = batch_size or SPACY_BATCH_SIZE
+    n_process = n_process or SPACY_N_PROCESS
+    
+    pending = [document for document in documents if document and document.ner_doc is None]
+    if not pending:
+        return
+    # Worker processes only pay off once there is more than one batch per process
+    if len(pending) <= batch_size:
+        n_process = 1
+    
+    docs = nlp.pipe(
+        (document.cleaned[:NER_MAX_CHARS] for document in pending),
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=_ner_disabled_pipes()
+    )
+    for document, doc in zip(pending, docs):
+        document.ner_doc = doc
+        check_deadline()
+
+def extract_skills_batch(texts, batch_size=None, n_process=None, taxonomy=None):
+    """Extract skills from many texts or Documents, sharing one batched NER pass"""
+    documents = [as_document(text) for text in texts]
+    
+    # Single pass over each text with the precompiled taxonomy matcher
+    taxonomy = taxonomy or current_taxonomy()
+    with timed_stage('extract_skills_keyword'):
+        found = []
+        for document in documents:
+            check_deadline()
+            found.append(taxonomy.find_skills(document.lower) if document else [])
     
     # Use spaCy for additional entity extraction if available
     if nlp:
         try:
-            doc = nlp(text)
-            for ent in doc.ents:
-                if ent.label_ in ['ORG', 'PRODUCT'] and len(ent.text) > 2:
-                    skill_candidate = ent.text.lower().strip()
-                    if skill_candidate not in found_skills and len(skill_candidate) < 20:
-                        found_skills.append(skill_candidate)
+            with timed_stage('extract_skills_ner'):
+                run_ner(documents, batch_size=batch_size, n_process=n_process)
+                for document, skills in zip(documents, found):
+                    if document.ner_doc is not None:
+                        _add_entity_skills(document.ner_doc, skills, set(skills))
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"Error in spaCy processing: {e}")
     
-    # Remove duplicates and return top skills
-    unique_skills = list(set(found_skills))
-    return unique_skills[:25]  # Limit to top 25 skills
+    return [skills[:25] for skills in found]  # Limit to top 25 skills
 
+def extract_skills(text):
+    """Extract skills from text using keyword matching and NLP"""
+    if not text:
+        return []
+    return extract_skills_batch([text], n_process=1)[0]
+
+EXPERIENCE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(\d+)\+?\s*years?\s*(?:of\s*)?(?:experience|exp)',
+    r'(\d+)\+?\s*yrs?\s*(?:of\s*)?(?:experience|exp)',
+    r'experience\s*(?:of\s*)?(\d+)\+?\s*years?',
+    r'(\d+)\+?\s*years?\s*in\s*(?:the\s*)?(?:field|industry|role)',
+    r'(\d+)\+?\s*years?\s*(?:working|work)',
+    r'over\s*(\d+)\s*years?',
+    r'more\s*than\s*(\d+)\s*years?'
+)]
+
+EDUCATION_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(?:bachelor|master|phd|b\.s\.|m\.s\.|b\.a\.|m\.a\.|b\.tech|m\.tech|mba).*?(?:in|of)\s*([^,\n\.]+)',
+    r'(?:university|college|institute).*?([^,\n\.]+)',
+    r'(?:degree|graduate|graduated).*?(?:in|from)\s*([^,\n\.]+)',
+    r'(?:bs|ms|ba|ma|phd)\s+(?:in\s+)?([^,\n\.]+)'
+)]
+
+@instrument_stage('experience')
 def extract_experience(text):
     """Extract years of experience from text"""
     if not text:
         return "Not specified"
     
-    experience_patterns = [
-        r'(\d+)\+?\s*years?\s*(?:of\s*)?(?:experience|exp)',
-        r'(\d+)\+?\s*yrs?\s*(?:of\s*)?(?:experience|exp)',
-        r'experience\s*(?:of\s*)?(\d+)\+?\s*years?',
-        r'(\d+)\+?\s*years?\s*in\s*(?:the\s*)?(?:field|industry|role)',
-        r'(\d+)\+?\s*years?\s*(?:working|work)',
-        r'over\s*(\d+)\s*years?',
-        r'more\s*than\s*(\d+)\s*years?'
-    ]
-    
-    text_lower = text.lower()
-    for pattern in experience_patterns:
-        match = re.search(pattern, text_lower)
+    # Years of experience are stated in the summary or the experience section;
+    # without an experience section they may be anywhere (projects, skills)
+    text_lower = as_document(text).region('summary', 'experience', required='experience').lower
+    for pattern in EXPERIENCE_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             years = match.group(1)
             return f"{years}+ years"
@@ -140,87 +176,139 @@ def extract_experience(text):
     
     return "Not specified"
 
+@instrument_stage('education')
 def extract_education(text):
     """Extract education information from text"""
     if not text:
         return ["Not specified"]
     
-    education_patterns = [
-        r'(?:bachelor|master|phd|b\.s\.|m\.s\.|b\.a\.|m\.a\.|b\.tech|m\.tech|mba).*?(?:in|of)\s*([^,\n\.]+)',
-        r'(?:university|college|institute).*?([^,\n\.]+)',
-        r'(?:degree|graduate|graduated).*?(?:in|from)\s*([^,\n\.]+)',
-        r'(?:bs|ms|ba|ma|phd)\s+(?:in\s+)?([^,\n\.]+)'
-    ]
-    
     education_info = []
-    text_lower = text.lower()
+    # The patterns stop at commas, periods and line breaks, so they read the
+    # raw section text rather than the cleaned text
+    text_lower = as_document(text).region('education', required='education').text.lower()
     
-    for pattern in education_patterns:
-        matches = re.findall(pattern, text_lower, re.IGNORECASE)
+    for pattern in EDUCATION_PATTERNS:
+        matches = pattern.findall(text_lower)
         for match in matches:
             cleaned_match = match.strip()
             if len(cleaned_match) > 3 and len(cleaned_match) < 50:
                 education_info.append(cleaned_match.title())
     
     # Remove duplicates
-    education_info = list(set(education_info))
+    education_info = list(dict.fromkeys(education_info))
     
     return education_info[:3] if education_info else ["Not specified"]
 
+# TF-IDF settings that pair_tfidf_similarity reproduces: the analyzer reads
+# each Document's cached stop-word filtered unigrams and bigrams.
+TFIDF_PARAMS = {
+    'analyzer': document_terms
+}
+
+# Vocabulary cap of the pairwise similarity, as TfidfVectorizer(max_features=...)
+PAIR_MAX_FEATURES = 1000
+# Smoothed IDF over a two-document corpus: ln((1 + 2) / (1 + df)) + 1
+PAIR_IDF_ONE_DOC = math.log(1.5) + 1.0
+
+def pair_tfidf_similarity(document1, document2):
+    """Cosine similarity of two Documents' TF-IDF vectors, fit on just the pair.
+    
+    Equal to fitting TfidfVectorizer(max_features=PAIR_MAX_FEATURES) on the
+    two texts, but computed from each Document's cached term counts. Shared terms have IDF 1
+    and the others PAIR_IDF_ONE_DOC, so each norm is the Document's cached
+    square sum corrected for the shared terms: per call, only the shared terms
+    are visited, and a reused (job) Document costs nothing.
+    """
+    counts1, counts2 = document1.term_counts, document2.term_counts
+    smaller, larger = (counts1, counts2) if len(counts1) <= len(counts2) else (counts2, counts1)
+    shared = [term for term in smaller if term in larger]
+    if len(counts1) + len(counts2) - len(shared) > PAIR_MAX_FEATURES:
+        return _capped_pair_similarity(counts1, counts2)
+    
+    dot = shared_square1 = shared_square2 = 0
+    for term in shared:
+        count1, count2 = counts1[term], counts2[term]
+        dot += count1 * count2
+        shared_square1 += count1 * count1
+        shared_square2 += count2 * count2
+    scale = PAIR_IDF_ONE_DOC * PAIR_IDF_ONE_DOC
+    norm1 = scale * (document1.term_square_sum - shared_square1) + shared_square1
+    norm2 = scale * (document2.term_square_sum - shared_square2) + shared_square2
+    if not dot or not norm1 or not norm2:
+        return 0.0
+    return dot / math.sqrt(norm1 * norm2)
+
+def _capped_pair_similarity(counts1, counts2):
+    """pair_tfidf_similarity over the PAIR_MAX_FEATURES most frequent terms of the pair.
+    
+    Terms are picked exactly as CountVectorizer does, ties included: an argsort
+    of the negated totals over the alphabetically sorted vocabulary.
+    """
+    totals = Counter(counts1)
+    totals.update(counts2)
+    vocabulary = sorted(totals)
+    frequencies = np.fromiter((totals[term] for term in vocabulary), dtype=np.int64, count=len(vocabulary))
+    kept = np.sort((-frequencies).argsort()[:PAIR_MAX_FEATURES])
+    vector1 = np.array([counts1.get(vocabulary[i], 0) for i in kept], dtype=np.float64)
+    vector2 = np.array([counts2.get(vocabulary[i], 0) for i in kept], dtype=np.float64)
+    idf = np.where((vector1 > 0) & (vector2 > 0), 1.0, PAIR_IDF_ONE_DOC)
+    vector1 *= idf
+    vector2 *= idf
+    norm = np.linalg.norm(vector1) * np.linalg.norm(vector2)
+    if not norm:
+        return 0.0
+    return float(vector1.dot(vector2) / norm)
+
+@instrument_stage('similarity')
 def calculate_text_similarity(text1, text2):
     """Calculate text similarity using TF-IDF and cosine similarity"""
     try:
         if not text1 or not text2:
             return 0.0
-        
-        # Create TF-IDF vectorizer
-        vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words='english',
-            ngram_range=(1, 2),
-            lowercase=True
-        )
-        
-        # Fit and transform texts
-        tfidf_matrix = vectorizer.fit_transform([text1, text2])
-        
-        # Calculate cosine similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        return float(similarity)
+        similarity = pair_tfidf_similarity(as_document(text1), as_document(text2))
+        return float(min(max(similarity, 0.0), 1.0))
         
     except Exception as e:
         logger.error(f"Error calculating text similarity: {e}")
         return 0.0
 
-def calculate_skill_match(resume_skills, job_skills):
-    """Calculate skill matching score"""
+@instrument_stage('skill_match')
+def calculate_skill_match(resume_skills, job_skills, skill_weights=None, canonical_job=None, taxonomy=None):
+    """Calculate skill matching score.
+    
+    Skills are mapped to canonical IDs through the taxonomy alias table and
+    matched by set membership. ``skill_weights`` optionally maps skill names
+    to weights (default 1.0) for the match percentage. ``canonical_job`` is
+    the taxonomy's distinct_canonical(job_skills) when the caller already has it.
+    Batch callers pass the ``taxonomy`` they fetched once, so a config reload
+    mid-batch cannot mix two taxonomies.
+    """
     if not resume_skills or not job_skills:
         return 0.0, [], []
     
-    resume_skills_lower = [skill.lower().strip() for skill in resume_skills]
-    job_skills_lower = [skill.lower().strip() for skill in job_skills]
+    taxonomy = taxonomy or current_taxonomy()
+    canonical_skill = taxonomy.canonical
+    resume_skill_ids = {canonical_skill(skill) for skill in resume_skills}
+    weights = {canonical_skill(skill): float(weight) for skill, weight in (skill_weights or {}).items()}
+    if canonical_job is None:
+        canonical_job = taxonomy.distinct_canonical(job_skills)
     
     matched_skills = []
     missing_skills = []
-    
-    for job_skill in job_skills:
-        job_skill_lower = job_skill.lower().strip()
-        
-        # Check for exact match or partial match
-        is_matched = False
-        for resume_skill in resume_skills_lower:
-            if (job_skill_lower == resume_skill or 
-                job_skill_lower in resume_skill or 
-                resume_skill in job_skill_lower):
-                matched_skills.append(job_skill)
-                is_matched = True
-                break
-        
-        if not is_matched:
+    matched_weight = 0.0
+    total_weight = 0.0
+    
+    for job_skill, skill_id in canonical_job:
+        weight = weights.get(skill_id, 1.0)
+        total_weight += weight
+        if skill_id in resume_skill_ids:
+            matched_skills.append(job_skill)
+            matched_weight += weight
+        else:
             missing_skills.append(job_skill)
     
     # Calculate match percentage
-    skill_match_percentage = (len(matched_skills) / len(job_skills)) * 100 if job_skills else 0
+    skill_match_percentage = (matched_weight / total_weight) * 100 if total_weight > 0 else 0
     
     return skill_match_percentage, matched_skills, missing_skills
 
@@ -251,75 +339,298 @@ def generate_suggestions(missing_skills, matched_skills, overall_score):
     return suggestions
 
 def parse_resume_text(resume_text):
-    """Parse resume text and extract structured information"""
+    """Parse resume text (or a Document) and extract structured information"""
     try:
         if not resume_text:
             return {"error": "Empty resume text"}
         
-        # Clean the text
-        cleaned_text = clean_text(resume_text)
+        # Cleaning happens once and is shared by every extractor
+        document = as_document(resume_text)
         
         # Extract information
-        skills = extract_skills(cleaned_text)
-        experience = extract_experience(cleaned_text)
-        education = extract_education(cleaned_text)
+        skills = extract_skills(document)
+        experience = extract_experience(document)
+        education = extract_education(document)
         
         return {
             "skills": skills,
             "experience": experience,
             "education": education,
-            "text_length": len(cleaned_text)
+            "text_length": len(document.cleaned)
         }
         
     except Exception as e:
         logger.error(f"Error parsing resume text: {e}")
         return {"error": f"Failed to parse resume: {str(e)}"}
 
-def calculate_match_score(resume_text, job_description_text, job_skills, resume_skills=None):
-    """Calculate comprehensive match score between resume and job description"""
+def parse_resume_batch(resume_texts, batch_size=None, n_process=None, taxonomy=None):
+    """Parse many resume texts (or Documents), sharing one batched NER pass"""
+    try:
+        documents = [as_document(text) for text in resume_texts]
+        skills = extract_skills_batch(documents, batch_size=batch_size, n_process=n_process, taxonomy=taxonomy)
+        
+        results = []
+        for document, document_skills in zip(documents, skills):
+            check_deadline()
+            if not document:
+                results.append({"error": "Empty resume text"})
+                continue
+            results.append({
+                "skills": document_skills,
+                "experience": extract_experience(document),
+                "education": extract_education(document),
+                "text_length": len(document.cleaned)
+            })
+        return results
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error parsing resume batch: {e}")
+        return [{"error": f"Failed to parse resume: {str(e)}"} for _ in resume_texts]
+
+def calculate_match_score(resume_text, job_description_text, job_skills, resume_skills=None, skill_weights=None,
+                          job_id=None):
+    """Calculate comprehensive match score between resume and job description.
+    
+    With a ``job_id``, the job's cleaned text, term counts and canonical skills
+    come from the job artifact cache (rebuilt if the text or skills changed),
+    so only the resume side is processed.
+    """
     try:
         if not resume_text or not job_description_text:
             return {"error": "Missing resume or job description text"}
         
+        # Both texts are cleaned once and shared by parsing and similarity
+        resume_document = as_document(resume_text)
+        # One taxonomy for job skills, resume skills and score weights
+        taxonomy = current_taxonomy()
+        if job_id is not None:
+            job = job_artifacts.get(job_id, job_description_text, job_skills, taxonomy)
+        else:
+            job = JobArtifacts(job_description_text, job_skills, taxonomy)
+        
         # Extract skills from resume if not provided
         if not resume_skills:
-            resume_analysis = parse_resume_text(resume_text)
-            resume_skills = resume_analysis.get("skills", [])
+            resume_skills = extract_skills_batch([resume_document], n_process=1, taxonomy=taxonomy)[0]
         
         # Calculate text similarity
-        text_similarity = calculate_text_similarity(resume_text, job_description_text)
+        text_similarity = calculate_text_similarity(resume_document, job.document)
         
-        # Calculate skill matching
-        skill_match_percentage, matched_skills, missing_skills = calculate_skill_match(
-            resume_skills, job_skills
-        )
+        return build_match_result(text_similarity, resume_skills, job.skills, skill_weights, job.canonical_skills,
+                                  taxonomy)
         
-        # Calculate overall score (weighted combination)
-        text_weight = 0.4
-        skill_weight = 0.6
+    except Exception as e:
+        logger.error(f"Error calculating match score: {e}")
+        return {"error": f"Failed to calculate match: {str(e)}"}
+
+def overall_match_score(text_similarity, skill_match_percentage, taxonomy=None):
+    """Weighted combination of text similarity (0-1) and skill match (0-100), as an int in [0, 100].
+    
+    The weights come from the taxonomy config (its "scoring" section), the active one by default.
+    """
+    taxonomy = taxonomy or current_taxonomy()
+    overall_score = (text_similarity * taxonomy.text_weight * 100) + (skill_match_percentage * taxonomy.skill_weight)
+    return min(100, max(0, int(overall_score)))
+
+def build_match_result(text_similarity, resume_skills, job_skills, skill_weights=None, canonical_job=None,
+                       taxonomy=None):
+    """Combine text similarity and skill match into the match score result"""
+    # Calculate skill matching
+    skill_match_percentage, matched_skills, missing_skills = calculate_skill_match(
+        resume_skills, job_skills, skill_weights, canonical_job, taxonomy
+    )
+    return assemble_match_result(text_similarity, skill_match_percentage, matched_skills, missing_skills, taxonomy)
+
+def assemble_match_result(text_similarity, skill_match_percentage, matched_skills, missing_skills, taxonomy=None):
+    """Match score result from an already computed text similarity and skill match"""
+    # Calculate overall score (weighted combination)
+    overall_score = overall_match_score(text_similarity, skill_match_percentage, taxonomy)
+    
+    # Generate suggestions
+    suggestions = generate_suggestions(missing_skills, matched_skills, overall_score)
+    
+    # Calculate ATS score (simplified version)
+    ats_score = overall_score  # In reality, this would be more complex
+    
+    return {
+        "match_score": overall_score,
+        "ats_score": ats_score,
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills,
+        "suggestions": suggestions,
+        "text_similarity": round(text_similarity * 100, 2),
+        "skill_match_percentage": round(skill_match_percentage, 2)
+    }
+
+@instrument_stage('similarity')
+def calculate_batch_similarity(job_text, texts):
+    """Text similarity of one job against many texts.
+    
+    Each score is pair_tfidf_similarity of that resume and the job alone, as in
+    calculate_match_score, so it does not depend on which other resumes share
+    the batch. The job Document is built once and reused for every pair.
+    """
+    if not job_text or not texts:
+        return np.zeros(len(texts))
+    
+    job_document = as_document(job_text)
+    
+    def scores():
+        for text in texts:
+            check_deadline()
+            yield pair_tfidf_similarity(as_document(text), job_document) if text else 0.0
+    
+    similarities = np.fromiter(scores(), dtype=np.float64, count=len(texts))
+    return np.clip(similarities, 0.0, 1.0)
+
+def rank_resumes(job_text, job_skills, resumes, skill_weights=None, sort=True):
+    """Score one job against many resumes and return results sorted by match score.
+    
+    Each resume is a dict with ``id``, ``text`` and optional ``skills``. Results have
+    the same shape as ``calculate_match_score`` plus the resume ``id``. With
+    ``sort=False`` results stay in input order.
+    """
+    try:
+        if not job_text:
+            return {"error": "Missing job description text"}
         
-        overall_score = (text_similarity * text_weight * 100) + (skill_match_percentage * skill_weight)
-        overall_score = min(100, max(0, int(overall_score)))
+        # One taxonomy for the whole batch, even if the config is reloaded meanwhile
+        taxonomy = current_taxonomy()
+        documents = [as_document(resume.get("text", "")) for resume in resumes]
+        similarities = calculate_batch_similarity(job_text, documents)
         
-        # Generate suggestions
-        suggestions = generate_suggestions(missing_skills, matched_skills, overall_score)
+        # Parse resumes without skills in one batched pass
+        unparsed = [i for i, resume in enumerate(resumes) if not resume.get("skills") and documents[i]]
+        parsed = parse_resume_batch([documents[i] for i in unparsed], taxonomy=taxonomy)
+        parsed_skills = {i: result.get("skills", []) for i, result in zip(unparsed, parsed)}
         
-        # Calculate ATS score (simplified version)
-        ats_score = overall_score  # In reality, this would be more complex
+        # Job skills are canonicalized once for the whole batch
+        canonical_job = taxonomy.distinct_canonical(job_skills)
+        ranked = []
+        for i, (resume, text_similarity) in enumerate(zip(resumes, similarities)):
+            check_deadline()
+            resume_skills = resume.get("skills") or parsed_skills.get(i, [])
+            
+            result = build_match_result(float(text_similarity), resume_skills, job_skills, skill_weights,
+                                        canonical_job, taxonomy)
+            result["id"] = resume.get("id")
+            ranked.append(result)
         
-        return {
-            "match_score": overall_score,
-            "ats_score": ats_score,
-            "matched_skills": matched_skills,
-            "missing_skills": missing_skills,
-            "suggestions": suggestions,
-            "text_similarity": round(text_similarity * 100, 2),
-            "skill_match_percentage": round(skill_match_percentage, 2)
-        }
+        if sort:
+            ranked.sort(key=lambda result: (result["match_score"], result["text_similarity"]), reverse=True)
+        return {"results": ranked}
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        logger.error(f"Error calculating match score: {e}")
-        return {"error": f"Failed to calculate match: {str(e)}"}
+        logger.error(f"Error ranking resumes: {e}")
+        return {"error": f"Failed to rank resumes: {str(e)}"}
+
+def shortlist_resumes(job_text, job_skills, resumes, k, skill_weights=None):
+    """The k best resumes by ``calculate_match_score``, skipping work that cannot change them.
+    
+    The skill match is computed for every resume first. Since text similarity is
+    at most 1, it bounds each resume's overall score; resumes are visited in
+    order of that bound and pairwise TF-IDF similarity is only computed while a
+    resume could still enter the current top k. Suggestions are generated for
+    the returned resumes only.
+    
+    Results (and their order, ties broken by input position) are identical to
+    scoring every resume with ``calculate_match_score`` and keeping the top k.
+    Resumes with no text are skipped, as calculate_match_score rejects them.
+    """
+    try:
+        if not job_text:
+            return {"error": "Missing job description text"}
+        if k < 1:
+            return {"results": [], "candidates": 0, "scored": 0}
+        
+        # One taxonomy for the whole batch, even if the config is reloaded meanwhile
+        taxonomy = current_taxonomy()
+        job_document = as_document(job_text)
+        documents = [as_document(resume.get("text", "")) for resume in resumes]
+        candidates = [i for i, document in enumerate(documents) if document]
+        
+        # Skills for resumes that came without them, in one batched pass
+        unparsed = [i for i in candidates if not resumes[i].get("skills")]
+        extracted = dict(zip(unparsed, extract_skills_batch([documents[i] for i in unparsed], taxonomy=taxonomy)))
+        
+        canonical_job = taxonomy.distinct_canonical(job_skills)
+        bounded = []
+        for i in candidates:
+            check_deadline()
+            skill_match = calculate_skill_match(resumes[i].get("skills") or extracted[i], job_skills, skill_weights,
+                                                canonical_job, taxonomy)
+            bounded.append((overall_match_score(1.0, skill_match[0], taxonomy), i, skill_match))
+        bounded.sort(key=lambda entry: (-entry[0], entry[1]))
+        
+        # Min-heap of the best k so far, keyed like the exhaustive sort; -i keeps earlier resumes first on ties
+        heap = []
+        scored = 0
+        for bound, i, skill_match in bounded:
+            if len(heap) >= k and bound < heap[0][0]:
+                break
+            check_deadline()
+            text_similarity = calculate_text_similarity(documents[i], job_document)
+            scored += 1
+            entry = (overall_match_score(text_similarity, skill_match[0], taxonomy), round(text_similarity * 100, 2),
+                     -i, text_similarity, skill_match)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        
+        results = []
+        for _, _, negative_index, text_similarity, skill_match in sorted(heap, reverse=True):
+            result = assemble_match_result(text_similarity, *skill_match, taxonomy)
+            result["id"] = resumes[-negative_index].get("id")
+            results.append(result)
+        return {"results": results, "candidates": len(candidates), "scored": scored}
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Error shortlisting resumes: {e}")
+        return {"error": f"Failed to shortlist resumes: {str(e)}"}
+
+# Sample used to exercise every stage once before serving
+WARM_UP_RESUME = """Jane Doe
+Summary
+Software engineer with 5 years of experience in Python, Docker and AWS.
+Education
+Bachelor of Science in Computer Science
+"""
+
+_warm_up_seconds = None
+
+def warm_up():
+    """Load and exercise everything a request needs, once per process.
+    
+    Run in the gunicorn master (``preload_app``) so forked workers share the
+    loaded modules and model copy-on-write instead of each paying for them.
+    """
+    global _warm_up_seconds
+    if _warm_up_seconds is not None:
+        return _warm_up_seconds
+    
+    started = time.time()
+    import pdfplumber  # noqa: F401 -- imported lazily by pdf_extraction
+    parse_resume_text(WARM_UP_RESUME)
+    calculate_match_score(WARM_UP_RESUME, "Python engineer with AWS experience", ["python", "aws"])
+    _warm_up_seconds = time.time() - started
+    logger.info(f"Models warmed up in {_warm_up_seconds:.2f}s (NER model: {MODEL_VERSION})")
+    return _warm_up_seconds
+
+def model_status():
+    """Readiness details: whether warm-up has run and which models are loaded"""
+    return {
+        'ready': _warm_up_seconds is not None,
+        'nerModel': MODEL_VERSION,
+        'nerAvailable': nlp is not None,
+        'taxonomyVersion': current_taxonomy().version,
+        'warmUpSeconds': round(_warm_up_seconds, 3) if _warm_up_seconds is not None else None
+    }
 
 # Test function
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+def cache_key(namespace, data, versions=()):
+    """Content-addressed key: hash of the input plus every version that affects the output"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    digest = hashlib.sha256()
+    digest.update(namespace.encode('utf-8'))
+    for version in versions:
+        digest.update(b'\0' + str(version).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(data)
+    return f"{namespace}:{digest.hexdigest()}"
+
+def _is_cacheable(value):
+    """Failed or empty results are recomputed rather than cached"""
+    if not value:
+        return False
+    return not (isinstance(value, dict) and 'error' in value)
+
+class ParseCache:
+    """Two-tier cache: bounded in-process LRU backed by an optional SQLite file.
+
+    The SQLite tier keeps the ``max_disk_entries`` most recently written rows.
+    """
+
+    def __init__(self, max_entries=1024, cache_dir=None, max_disk_entries=100000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = os.path.join(cache_dir, 'parse_cache.sqlite3') if cache_dir else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'diskHits': 0, 'diskEvictions': 0}
+
+        if self.db_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS entries '
+                    '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)')
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from PARSE_CACHE_SIZE, PARSE_CACHE_DIR and PARSE_CACHE_DISK_ENTRIES"""
+        return cls(
+            max_entries=int(os.environ.get('PARSE_CACHE_SIZE', 1024)),
+            cache_dir=os.environ.get('PARSE_CACHE_DIR') or None,
+            max_disk_entries=int(os.environ.get('PARSE_CACHE_DISK_ENTRIES', 100000))
+        )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call stays safe across forked workers and threads
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key, value):
+        """Insert into the memory tier, evicting least recently used entries"""
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, key):
+        """Return the cached value or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._memory[key]
+
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Parse cache read failed: {e}")
+                row = None
+            if row:
+                value = json.loads(row[0])
+                self._remember(key, value)
+                self._count('hits')
+                self._count('diskHits')
+                return value
+
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        """Store a JSON-serializable value in both tiers, dropping the oldest disk rows beyond the cap"""
+        self._remember(key, value)
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value), time.time())
+                    )
+                    pruned = conn.execute(
+                        'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY created_at '
+                        'LIMIT MAX(0, (SELECT COUNT(*) FROM entries) - ?))',
+                        (self.max_disk_entries,)
+                    ).rowcount
+            except sqlite3.Error as e:
+                logger.warning(f"Parse cache write failed: {e}")
+                pruned = 0
+            if pruned > 0:
+                self._count('diskEvictions', pruned)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute()
+        if _is_cacheable(value):
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM entries')
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._memory)
+        stats['maxEntries'] = self.max_entries
+        stats['persistent'] = bool(self.db_path)
+        if self.db_path:
+            stats['maxDiskEntries'] = self.max_disk_entries
+        return stats
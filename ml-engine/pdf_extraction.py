@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import time
+import logging
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+# Pages beyond this are ignored
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 50))
+# Seconds allowed for a whole document before extraction gives up
+PDF_TIMEOUT = float(os.environ.get('PDF_TIMEOUT', 30))
+# Worker processes per document for page-parallel extraction. Pages always run
+# in at least one worker process, so a page that hangs can be killed at the timeout
+PDF_WORKERS = int(os.environ.get('PDF_WORKERS', 2))
+
+# pdfplumber is imported on first use: only PDF uploads need it, and nlp_processor.warm_up
+# preloads it for gunicorn workers
+
+def _context():
+    """Fork where possible: workers share the parent's already imported modules
+    copy-on-write instead of re-importing the app (and reloading spaCy)"""
+    method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+def _worker(conn, func, args):
+    """Runs in a per-document worker process: send back func(*args), or None if it failed"""
+    try:
+        conn.send(func(*args))
+    except Exception as e:
+        logger.error(f"PDF worker {func.__name__}{args[1:]} failed: {e}")
+        conn.send(None)
+    finally:
+        conn.close()
+
+def _start_worker(context, func, *args):
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_worker, args=(sender, func, args), daemon=True)
+    process.start()
+    sender.close()
+    return receiver, process
+
+def _stop_worker(receiver, process):
+    receiver.close()
+    if process.is_alive():
+        process.kill()
+    process.join()
+
+def read_pdf_bytes(source):
+    """Accept raw bytes, a binary file object or a path"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, 'read'):
+        return source.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+def count_pages(pdf_bytes):
+    import pdfplumber
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        return len(pdf.pages)
+
+def extract_pages(pdf_bytes, start, stop, deadline=None):
+    """Text of pages [start, stop); stops early once the deadline has passed"""
+    import pdfplumber
+    texts = []
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages[start:stop]:
+            if deadline is not None and time.time() > deadline:
+                logger.warning(f"PDF extraction deadline reached after {len(texts)} pages")
+                break
+            page_text = page.extract_text()
+            if page_text:
+                texts.append(page_text)
+    return texts
+
+def extract_pdf(source, max_pages=None, timeout=None, workers=None):
+    """Extract text from a PDF, splitting pages across worker processes.
+
+    At most ``max_pages`` pages are read. If ``timeout`` seconds pass, the
+    text of the pages finished so far (in page order) is returned and this
+    document's stuck workers are killed. Returns (text, complete), where
+    complete is False when pages were lost to the timeout or a failed worker.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    timeout = PDF_TIMEOUT if timeout is None else timeout
+    workers = max(1, PDF_WORKERS if workers is None else workers)
+
+    pdf_bytes = read_pdf_bytes(source)
+    deadline = time.time() + timeout
+
+    if multiprocessing.current_process().daemon:
+        # Daemonic processes (e.g. multiprocessing.Pool workers) cannot start
+        # children; extract here and stop between pages at the deadline
+        texts = extract_pages(pdf_bytes, 0, max_pages, deadline)
+        return '\n'.join(texts).strip(), time.time() <= deadline
+
+    # Opening the PDF to count its pages can hang on a malformed file as well,
+    # so it runs in a worker under the same deadline as the pages
+    context = _context()
+    receiver, process = _start_worker(context, count_pages, pdf_bytes)
+    try:
+        page_count = receiver.recv() if receiver.poll(max(0.0, deadline - time.time())) else None
+    except EOFError:
+        page_count = None
+    finally:
+        _stop_worker(receiver, process)
+    if page_count is None:
+        logger.warning(f"PDF page count failed or timed out after {timeout}s")
+        return '', False
+    page_count = min(page_count, max_pages)
+    if page_count <= 0:
+        return '', True
+
+    # Contiguous page ranges, one per worker. Each document gets its own
+    # processes, so a page stuck past the timeout is killed without touching
+    # extractions running for other requests.
+    chunk = -(-page_count // min(workers, page_count))
+    ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+    workers = [(start, *_start_worker(context, extract_pages, pdf_bytes, start, stop)) for start, stop in ranges]
+
+    texts = []
+    complete = True
+    try:
+        for start, receiver, process in workers:
+            try:
+                if not receiver.poll(max(0.0, deadline - time.time())):
+                    logger.warning(f"PDF extraction timed out after {timeout}s at page {start}; returning partial text")
+                    complete = False
+                    break
+                pages = receiver.recv()
+            except EOFError:
+                # The worker died without answering (e.g. out of memory)
+                logger.error(f"PDF worker for page {start} exited without a result")
+                pages = None
+            if pages is None:
+                complete = False
+                continue
+            texts.extend(pages)
+    finally:
+        for _, receiver, process in workers:
+            _stop_worker(receiver, process)
+    return '\n'.join(texts).strip(), complete
+
+def extract_pdf_text(source, max_pages=None, timeout=None, workers=None):
+    """Text of a PDF, possibly partial; see extract_pdf"""
+    return extract_pdf(source, max_pages=max_pages, timeout=timeout, workers=workers)[0]
@@ -0,0 +1,172 @@
+import cProfile
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+import logging
+
+from flask import abort, g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+# Request header that asks for a profile of this request
+PROFILE_REQUEST_HEADER = 'X-Profile'
+# Response header carrying the ID of the written profile
+PROFILE_ID_HEADER = 'X-Profile-Id'
+# Stacks deeper than this are cut off in the collapsed output
+MAX_STACK_DEPTH = 100
+# Call paths holding less than this fraction of the total time are folded
+# into their caller, and at most MAX_STACKS distinct stacks are produced
+MIN_STACK_FRACTION = 0.0005
+MAX_STACKS = 20000
+# IDs are <timestamp>-<8 hex>, see RequestProfiler._finish
+PROFILE_ID_PATTERN = re.compile(r'^[0-9T]{15}-[0-9a-f]{8}$')
+
+def _frame_name(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins are reported as ('~', 0, '<built-in method ...>')
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+def collapsed_stacks(stats):
+    """Approximate folded stacks ("a;b;c <microseconds>") from a pstats.Stats.
+
+    cProfile only records caller/callee edges, so each function's own time is
+    split between its callers in proportion to the time spent via each edge.
+    The number of call paths grows exponentially with a shared call graph, so
+    paths below MIN_STACK_FRACTION of the total are charged to their caller
+    and the walk stops expanding after MAX_STACKS stacks; the folded totals
+    still add up to the profiled time.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    names = {func: _frame_name(func) for func in raw}
+
+    roots = [func for func, entry in raw.items() if not entry[4]]
+    threshold = sum(raw[root][3] for root in roots) * MIN_STACK_FRACTION
+    lines = {}
+    # Depth-first over (function, stack string, functions on the path, share)
+    pending = [(root, names[root], (root,), 1.0) for root in reversed(roots)]
+    while pending:
+        func, stack, path, share = pending.pop()
+        own_time = raw[func][2] * share
+        expand = len(path) < MAX_STACK_DEPTH and len(lines) < MAX_STACKS
+        for callee, edge_time in callees.get(func, ()):
+            total = raw[callee][3]
+            if callee in path or total <= 0 or edge_time <= 0:
+                continue
+            callee_share = share * min(1.0, edge_time / total)
+            if expand and total * callee_share >= threshold:
+                pending.append((callee, f"{stack};{names[callee]}", path + (callee,), callee_share))
+            else:
+                own_time += total * callee_share
+        lines[stack] = lines.get(stack, 0) + own_time
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in sorted(lines.items()) if seconds * 1e6 >= 1]
+
+class RequestProfiler:
+    """Opt-in cProfile capture of whole requests.
+
+    A request is profiled when it carries ``X-Profile: 1`` or is picked by
+    ``sample_rate``. Only its ``.prof`` is written to ``profile_dir`` on the
+    request path and the ID is returned in ``X-Profile-Id``; folded stacks
+    (flamegraph input) are computed on first read from
+    ``/debug/profiles/<id>`` and kept next to it as ``.collapsed``.
+    Nothing is registered on the app unless profiling is configured.
+    """
+
+    def __init__(self, profile_dir, sample_rate=0.0):
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        os.makedirs(profile_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Configured by PROFILE_DIR (unset disables profiling) and PROFILE_SAMPLE_RATE"""
+        profile_dir = os.environ.get('PROFILE_DIR')
+        if not profile_dir:
+            return None
+        return cls(profile_dir, sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)))
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/debug/profiles', 'list_profiles_endpoint', self.list_profiles_endpoint)
+        app.add_url_rule('/debug/profiles/<profile_id>', 'profile_stacks_endpoint', self.profile_stacks_endpoint)
+
+    def _wanted(self):
+        if request.headers.get(PROFILE_REQUEST_HEADER, '').lower() in ('1', 'true', 'yes'):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self._wanted():
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler is already active in this process
+            logger.warning(f"Request profiling skipped: {e}")
+            return
+        g.request_profile = profile
+        g.request_profile_started = time.perf_counter()
+
+    def _finish(self, response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        profile.disable()
+        elapsed = time.perf_counter() - g.pop('request_profile_started')
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        try:
+            self.write(profile, profile_id)
+        except OSError as e:
+            logger.error(f"Could not write profile {profile_id}: {e}")
+            return response
+        logger.info(f"Profiled {request.method} {request.path} in {elapsed:.3f}s as {profile_id}")
+        response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    def write(self, profile, profile_id):
+        """Write <id>.prof (pstats); folding is left to collapsed()"""
+        profile.dump_stats(os.path.join(self.profile_dir, profile_id + '.prof'))
+
+    def profile_ids(self):
+        """IDs of the written profiles, newest first"""
+        return sorted((name[:-len('.prof')] for name in os.listdir(self.profile_dir)
+                       if name.endswith('.prof') and PROFILE_ID_PATTERN.match(name[:-len('.prof')])),
+                      reverse=True)
+
+    def collapsed(self, profile_id):
+        """Folded stacks of a profile, computed once and cached as <id>.collapsed"""
+        base = os.path.join(self.profile_dir, profile_id)
+        try:
+            with open(base + '.collapsed') as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        text = '\n'.join(collapsed_stacks(pstats.Stats(base + '.prof'))) + '\n'
+        # Write then rename so concurrent readers never see half a file
+        partial = f"{base}.collapsed.{os.getpid()}.tmp"
+        with open(partial, 'w') as f:
+            f.write(text)
+        os.replace(partial, base + '.collapsed')
+        return text
+
+    def list_profiles_endpoint(self):
+        """List captured profiles"""
+        return jsonify({"profiles": self.profile_ids()})
+
+    def profile_stacks_endpoint(self, profile_id):
+        """Folded stacks of one profile as text/plain"""
+        if not PROFILE_ID_PATTERN.match(profile_id) or \
+                not os.path.exists(os.path.join(self.profile_dir, profile_id + '.prof')):
+            abort(404)
+        return self.collapsed(profile_id), 200, {'Content-Type': 'text/plain; charset=utf-8'}
@@ -0,0 +1,62 @@
+import re
+
+# Header titles (lowercase) mapped to the canonical section they open
+SECTION_HEADERS = {
+    'summary': ['summary', 'professional summary', 'career summary', 'profile', 'professional profile',
+                'objective', 'career objective', 'about me', 'about'],
+    'experience': ['experience', 'work experience', 'professional experience', 'relevant experience',
+                   'employment', 'employment history', 'work history', 'career history', 'experience summary'],
+    'education': ['education', 'academic background', 'educational background', 'academics',
+                  'education and training', 'qualifications', 'academic qualifications'],
+    'skills': ['skills', 'technical skills', 'key skills', 'core skills', 'core competencies', 'competencies',
+               'technologies', 'tech stack', 'skills and abilities', 'skills & abilities'],
+    'projects': ['projects', 'personal projects', 'key projects', 'academic projects'],
+    'certifications': ['certifications', 'certificates', 'licenses and certifications',
+                       'licenses & certifications', 'courses'],
+    'awards': ['awards', 'honors', 'honours', 'achievements', 'awards and honors']
+}
+
+HEADER_LOOKUP = {title: section for section, titles in SECTION_HEADERS.items() for title in titles}
+
+# Optional bullet/markdown prefix, a short title, then an optional ':' with inline content
+HEADER_PATTERN = re.compile(r'^[\s#*\-•=]*(?P<title>[A-Za-z][A-Za-z &]{1,40}?)[\s*=]*(?::\s*(?P<rest>.*))?$')
+
+# Text before the first header (name, contact line, opening summary)
+PREAMBLE = 'summary'
+
+def detect_header(line):
+    """Return (section, inline content) if the line is a section header, else None"""
+    match = HEADER_PATTERN.match(line)
+    if not match:
+        return None
+    section = HEADER_LOOKUP.get(' '.join(match.group('title').lower().split()))
+    if section is None:
+        return None
+    return section, (match.group('rest') or '').strip()
+
+def segment_sections(text):
+    """Split resume text into canonical sections using header detection.
+
+    Returns a dict of section name to text. Content before the first header
+    is filed under 'summary'; an empty dict means no header was found.
+    """
+    if not text:
+        return {}
+
+    sections = {}
+    current = PREAMBLE
+    found_header = False
+    for line in text.splitlines():
+        header = detect_header(line)
+        if header:
+            current, inline = header
+            found_header = True
+            if inline:
+                sections.setdefault(current, []).append(inline)
+            continue
+        if line.strip():
+            sections.setdefault(current, []).append(line)
+
+    if not found_header:
+        return {}
+    return {name: '\n'.join(lines) for name, lines in sections.items()}
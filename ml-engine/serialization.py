@@ -0,0 +1,107 @@
+import gzip
+import os
+import zlib
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+# Optional accelerators: orjson encodes several times faster than the stdlib,
+# msgpack enables application/msgpack responses. Both fall back cleanly.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+# zlib level for gzip/deflate responses; 6 is the usual size/CPU trade-off
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+
+def _default(value):
+    """Encode numpy scalars/arrays, then whatever Flask's encoder supports"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return DefaultJSONProvider.default(value)
+
+def requested_fields():
+    """Top-level fields named by ?fields=a,b,c, or None to return everything"""
+    if not has_request_context():
+        return None
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    return set(fields) or None
+
+def project_fields(body, fields):
+    """Keep only the named top-level fields of a response body. Error bodies pass through."""
+    if fields is None or not isinstance(body, dict) or 'error' in body:
+        return body
+    return {key: value for key, value in body.items() if key in fields}
+
+def wants_msgpack():
+    if msgpack is None or not has_request_context():
+        return False
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider for the response path.
+
+    Encodes with orjson when installed (stdlib json otherwise, compact and
+    unsorted), applies ``?fields=`` projection, and answers in MessagePack
+    when the client prefers it via Accept.
+    """
+
+    sort_keys = False
+    ensure_ascii = False
+    compact = True
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.dumps(obj, default=_default,
+                                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+            except TypeError:
+                # e.g. integers beyond 64 bits; the stdlib encoder copes
+                pass
+        kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = project_fields(self._prepare_response_obj(args, kwargs), requested_fields())
+        if wants_msgpack():
+            response = self._app.response_class(msgpack.packb(obj, default=_default, use_bin_type=True),
+                                                mimetype=MSGPACK_MIMETYPES[0])
+        else:
+            response = self._app.response_class(f"{self.dumps(obj)}\n", mimetype=self.mimetype)
+        response.vary.add('Accept')
+        return response
+
+def compress_response(response):
+    """after_request hook: gzip or deflate sizeable bodies the client accepts compressed.
+
+    Streamed responses (NDJSON) are left alone so lines still reach the
+    client as soon as they are produced.
+    """
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers):
+        return response
+    # No Accept-Encoding header means the client never asked for compression
+    encoding = request.accept_encodings.best_match(('gzip', 'deflate')) if request.accept_encodings else None
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    if encoding == 'gzip':
+        response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0))
+    else:
+        response.set_data(zlib.compress(data, COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,78 @@
+import threading
+import time
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class WaitTimeout(Exception):
+    """Raised to a caller that gave up waiting for a call in flight"""
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one computation.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the same result (or exception).
+    Nothing is kept once the call finishes, so this is not a cache: later
+    callers compute afresh.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'executed': 0, 'coalesced': 0, 'retried': 0}
+
+    def do(self, key, func, timeout=None, unshared=()):
+        """Return (func() result, True if it was shared from a call already in flight)
+
+        A waiting caller gives up after ``timeout`` seconds with WaitTimeout.
+        Exceptions of the ``unshared`` types belong to the caller that ran
+        func (e.g. its own deadline passing), so waiters are not handed them
+        and try again, running func themselves if nobody else is.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    self._stats['executed'] += 1
+                    leader = True
+                else:
+                    call.waiters += 1
+                    self._stats['coalesced'] += 1
+                    leader = False
+            if leader:
+                break
+
+            if not call.done.wait(None if give_up is None else max(0.0, give_up - time.monotonic())):
+                raise WaitTimeout(f"Gave up waiting for {key}")
+            if isinstance(call.error, unshared):
+                with self._lock:
+                    self._stats['retried'] += 1
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['inFlight'] = len(self._calls)
+        return stats
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skill_taxonomy.json')
+
+# Weights of text similarity and skill match in the overall match score,
+# unless the config file's "scoring" section overrides them
+DEFAULT_TEXT_WEIGHT = 0.4
+DEFAULT_SKILL_WEIGHT = 0.6
+
+def _build_trie(words):
+    """Build a character trie; the '' key marks the end of a word"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+def _trie_to_regex(node):
+    """Turn a trie into a regex where shared prefixes are matched only once"""
+    branches = [re.escape(char) + _trie_to_regex(child)
+                for char, child in sorted(node.items()) if char != '']
+    if not branches:
+        return ''
+
+    is_word_end = '' in node
+    if len(branches) == 1 and not is_word_end:
+        return branches[0]
+
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if is_word_end else pattern
+
+def compile_skill_pattern(skills):
+    """Compile skills into a single word-bounded alternation regex.
+
+    The alternation is laid out as a trie so each text position follows one
+    branch, keeping matching cost flat as the taxonomy grows.
+    """
+    if not skills:
+        return None
+    return re.compile(r'(?<!\w)' + _trie_to_regex(_build_trie(skills)) + r'(?!\w)')
+
+def normalize_skill(skill):
+    """Lowercase and collapse whitespace in a skill name"""
+    return ' '.join(str(skill).lower().split())
+
+class SkillTaxonomy:
+    """Immutable skill taxonomy and scoring weights, compiled into a one-pass matcher.
+
+    ``fingerprint`` identifies the exact config (version plus content hash)
+    and belongs in any cache key for results that depend on it.
+    """
+
+    def __init__(self, version, technical_skills, soft_skills, aliases=None,
+                 text_weight=DEFAULT_TEXT_WEIGHT, skill_weight=DEFAULT_SKILL_WEIGHT, fingerprint=None):
+        self.version = version
+        self.fingerprint = fingerprint or version
+        self.technical_skills = tuple(dict.fromkeys(normalize_skill(s) for s in technical_skills))
+        self.soft_skills = tuple(dict.fromkeys(normalize_skill(s) for s in soft_skills))
+        self.skills = frozenset(self.technical_skills + self.soft_skills)
+        # Alias -> canonical skill; every canonical skill maps to itself
+        aliases_map = {skill: skill for skill in self.skills}
+        for alias, skill in (aliases or {}).items():
+            aliases_map[normalize_skill(alias)] = normalize_skill(skill)
+        self.aliases = MappingProxyType(aliases_map)
+        self.pattern = compile_skill_pattern(aliases_map)
+        self.text_weight = float(text_weight)
+        self.skill_weight = float(skill_weight)
+        if self.text_weight < 0 or self.skill_weight < 0:
+            raise ValueError("Scoring weights must not be negative")
+
+    def canonical(self, skill):
+        """Canonical ID for a skill name; unknown skills keep their normalized name"""
+        name = normalize_skill(skill)
+        return self.aliases.get(name, name)
+
+    def distinct_canonical(self, skills):
+        """(name, canonical ID) for each distinct skill, first occurrence kept, unknown empties dropped"""
+        seen = set()
+        pairs = []
+        for skill in skills or []:
+            skill_id = self.canonical(skill)
+            if not skill_id or skill_id in seen:
+                continue
+            seen.add(skill_id)
+            pairs.append((skill, skill_id))
+        return tuple(pairs)
+
+    def find_skills(self, text):
+        """Return canonical skills found in text, in order of first appearance"""
+        if not text or self.pattern is None:
+            return []
+        aliases = self.aliases
+        return list(dict.fromkeys(aliases[match.group(0)] for match in self.pattern.finditer(text.lower())))
+
+def _flatten(section):
+    """Skill lists may be flat or grouped by category"""
+    if isinstance(section, dict):
+        return [skill for skills in section.values() for skill in skills]
+    return list(section or [])
+
+def taxonomy_path():
+    return os.environ.get('SKILL_TAXONOMY_PATH', DEFAULT_TAXONOMY_PATH)
+
+def load_taxonomy(path=None):
+    """Load and compile a skill taxonomy and scoring weights from a versioned JSON file"""
+    path = path or taxonomy_path()
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw.decode('utf-8'))
+    scoring = data.get('scoring') or {}
+
+    version = str(data.get('version', 'unversioned'))
+    taxonomy = SkillTaxonomy(
+        version=version,
+        technical_skills=_flatten(data.get('technical')),
+        soft_skills=_flatten(data.get('soft')),
+        aliases=data.get('aliases'),
+        text_weight=scoring.get('textWeight', DEFAULT_TEXT_WEIGHT),
+        skill_weight=scoring.get('skillWeight', DEFAULT_SKILL_WEIGHT),
+        # An edit that forgets to bump "version" still gets new cache keys
+        fingerprint=f"{version}:{hashlib.sha256(raw).hexdigest()[:12]}"
+    )
+    logger.info(f"Loaded skill taxonomy {taxonomy.version} with {len(taxonomy.skills)} skills")
+    return taxonomy
+
+# Compiled at import; replaced as a whole by activate(), never modified in place
+_active = load_taxonomy()
+
+def current_taxonomy():
+    """The active taxonomy. Read it once per operation, since a reload may swap it"""
+    return _active
+
+def activate(taxonomy):
+    """Atomically make taxonomy the active one; returns the previous one"""
+    global _active
+    previous, _active = _active, taxonomy
+    return previous
+
+def canonical_skill(skill):
+    """Canonical ID for a skill name under the active taxonomy"""
+    return _active.canonical(skill)
+
+class TaxonomyReloader:
+    """Hot reload of the taxonomy config file.
+
+    ``maybe_reload`` is cheap enough to call per request: it stats the file at
+    most every ``interval`` seconds and swaps in a freshly compiled taxonomy
+    when the file changed. Each process (gunicorn worker, task worker) polls
+    on its own, so a config change reaches all of them without a restart. A
+    file that fails to load or validate is logged and the current config kept.
+    """
+
+    def __init__(self, path=None, interval=5.0):
+        self.path = path or taxonomy_path()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._stamp = self._file_stamp()
+
+    @classmethod
+    def from_env(cls):
+        """Configured by SKILL_TAXONOMY_PATH and CONFIG_POLL_SECONDS (0 disables the watcher)"""
+        return cls(interval=float(os.environ.get('CONFIG_POLL_SECONDS', 5)))
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def maybe_reload(self):
+        """Reload if the file changed since the last check; returns the new taxonomy or None"""
+        if self.interval <= 0 or time.monotonic() - self._checked < self.interval:
+            return None
+        # One thread checks; the others carry on with the current config
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            self._checked = time.monotonic()
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp:
+                return None
+            self._stamp = stamp
+            try:
+                taxonomy = load_taxonomy(self.path)
+            except Exception as e:
+                logger.error(f"Keeping skill taxonomy {_active.version}: {self.path} failed to load: {e}")
+                return None
+            previous = activate(taxonomy)
+            logger.info(f"Skill taxonomy reloaded: {previous.version} -> {taxonomy.version}")
+            return taxonomy
+        finally:
+            self._lock.release()
+
+    def reload(self):
+        """Load the file now and swap it in; raises if it does not load"""
+        with self._lock:
+            self._stamp = self._file_stamp()
+            self._checked = time.monotonic()
+            taxonomy = load_taxonomy(self.path)
+            activate(taxonomy)
+            return taxonomy
@@ -0,0 +1,268 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+import urllib.parse
+import urllib.request
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Hosts that task callbacks may be POSTed to (comma-separated). Callbacks are
+# refused when unset, so a client cannot make the engine call internal services.
+TASK_CALLBACK_HOSTS = frozenset(host.strip().lower() for host in os.environ.get('TASK_CALLBACK_HOSTS', '').split(',')
+                                if host.strip())
+
+class QueueFullError(Exception):
+    """Raised when the queue is at capacity and cannot accept another task"""
+
+def _timed_call(func, args):
+    """Runs in the worker: record when the task actually started"""
+    started_at = time.time()
+    return started_at, func(*args)
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+# ── Task stores ───────────────────────────────────────────────────────────────
+
+class MemoryTaskStore:
+    """Task records kept in this process, oldest finished tasks dropped first"""
+
+    def __init__(self, max_tasks=10000):
+        self.max_tasks = max_tasks
+        self._tasks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, task):
+        with self._lock:
+            self._tasks[task['taskId']] = dict(task)
+            while len(self._tasks) > self.max_tasks:
+                self._tasks.popitem(last=False)
+
+    def update(self, task_id, **fields):
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id].update(fields)
+
+    def get(self, task_id):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return dict(task) if task else None
+
+class SQLiteTaskStore:
+    """Task records in a SQLite file, so any worker process can answer a poll"""
+
+    def __init__(self, store_dir, max_tasks=10000):
+        os.makedirs(store_dir, exist_ok=True)
+        self.db_path = os.path.join(store_dir, 'tasks.sqlite3')
+        self.max_tasks = max_tasks
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS tasks '
+                         '(task_id TEXT PRIMARY KEY, submitted_at REAL NOT NULL, data TEXT NOT NULL)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, task):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO tasks (task_id, submitted_at, data) VALUES (?, ?, ?)',
+                         (task['taskId'], task['submittedAt'], json.dumps(task)))
+            conn.execute('DELETE FROM tasks WHERE task_id NOT IN '
+                         '(SELECT task_id FROM tasks ORDER BY submitted_at DESC LIMIT ?)', (self.max_tasks,))
+
+    def update(self, task_id, **fields):
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+            if row:
+                task = json.loads(row[0])
+                task.update(fields)
+                conn.execute('UPDATE tasks SET data = ? WHERE task_id = ?', (json.dumps(task), task_id))
+
+    def get(self, task_id):
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+# ── Queues ────────────────────────────────────────────────────────────────────
+
+class LocalTaskQueue:
+    """Bounded task queue executed by a local worker pool.
+
+    ``use_processes`` selects a process pool (CPU-bound parsing runs outside
+    the web worker) or a thread pool (in-process; used by tests). Tasks are
+    plain module-level functions so they can be sent to worker processes.
+    """
+
+    def __init__(self, workers=2, max_queue=100, use_processes=True, store=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self.store = store or MemoryTaskStore()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self._waits = deque(maxlen=1000)
+        self._counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.use_processes:
+                method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers)
+        return self._executor
+
+    def submit(self, func, *args, kind='task', callback_url=None):
+        """Queue func(*args); returns the task ID or raises QueueFullError"""
+        with self._lock:
+            if self._outstanding >= self.max_queue:
+                self._counts['rejected'] += 1
+                raise QueueFullError(f"Task queue is full ({self.max_queue} tasks)")
+            self._outstanding += 1
+            self._counts['submitted'] += 1
+
+        task_id = uuid.uuid4().hex
+        submitted_at = time.time()
+        self.store.put({
+            'taskId': task_id,
+            'kind': kind,
+            'status': 'queued',
+            'submittedAt': submitted_at,
+            'callbackUrl': callback_url
+        })
+
+        try:
+            with self._lock:
+                future = self._get_executor().submit(_timed_call, func, args)
+        except Exception:
+            self._finish(task_id, submitted_at, None, error='Task could not be scheduled')
+            raise
+        future.add_done_callback(lambda f: self._on_done(task_id, submitted_at, f))
+        return task_id
+
+    def _on_done(self, task_id, submitted_at, future):
+        try:
+            started_at, result = future.result()
+            self._finish(task_id, submitted_at, started_at, result=result)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool for later tasks
+            with self._lock:
+                self._executor = None
+            self._finish(task_id, submitted_at, None, error='Worker process crashed')
+        except Exception as e:
+            logger.error(f"Task {task_id} failed: {e}")
+            self._finish(task_id, submitted_at, None, error=str(e))
+
+    def _finish(self, task_id, submitted_at, started_at, result=None, error=None):
+        finished_at = time.time()
+        with self._lock:
+            self._outstanding -= 1
+            self._counts['failed' if error else 'completed'] += 1
+            if started_at is not None:
+                self._waits.append(started_at - submitted_at)
+
+        fields = {
+            'status': 'failed' if error else 'done',
+            'startedAt': started_at,
+            'finishedAt': finished_at
+        }
+        if error:
+            fields['error'] = error
+        else:
+            fields['result'] = result
+        self.store.update(task_id, **fields)
+
+        task = self.store.get(task_id)
+        if task and task.get('callbackUrl'):
+            threading.Thread(target=_post_callback, args=(task,), daemon=True).start()
+
+    def get(self, task_id):
+        """Task record (status, timestamps, result or error) or None"""
+        return self.store.get(task_id)
+
+    def stats(self):
+        """Queue depth, outcome counters and queue wait time percentiles"""
+        with self._lock:
+            waits = list(self._waits)
+            stats = dict(self._counts)
+            stats['queueDepth'] = self._outstanding
+        stats['maxQueue'] = self.max_queue
+        stats['workers'] = self.workers
+        stats['waitSeconds'] = {
+            'p50': round(_percentile(waits, 0.5), 4),
+            'p95': round(_percentile(waits, 0.95), 4),
+            'max': round(max(waits), 4) if waits else 0.0
+        }
+        return stats
+
+def callback_url_allowed(url, allowed_hosts=None):
+    """True if url is http(s) on a host listed in TASK_CALLBACK_HOSTS"""
+    allowed_hosts = TASK_CALLBACK_HOSTS if allowed_hosts is None else allowed_hosts
+    try:
+        parsed = urllib.parse.urlsplit(url)
+        parsed.port  # raises ValueError for a malformed port
+    except ValueError:
+        return False
+    return parsed.scheme in ('http', 'https') and (parsed.hostname or '').lower() in allowed_hosts
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Refuse redirects, which could point a callback at a host outside the allowlist"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+_callback_opener = urllib.request.build_opener(_NoRedirect)
+
+def _post_callback(task):
+    """POST the finished task record to its callback URL"""
+    if not callback_url_allowed(task['callbackUrl']):
+        logger.warning(f"Callback for task {task['taskId']} skipped: host not allowed")
+        return
+    body = json.dumps({key: value for key, value in task.items() if key != 'callbackUrl'}).encode('utf-8')
+    req = urllib.request.Request(task['callbackUrl'], data=body,
+                                 headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with _callback_opener.open(req, timeout=10):
+            pass
+    except Exception as e:
+        logger.warning(f"Callback for task {task['taskId']} failed: {e}")
+
+def create_task_queue():
+    """Build the task queue selected by TASK_QUEUE_BACKEND ('process' or 'thread').
+
+    Task records go to SQLite under TASK_STORE_DIR, or stay in this process
+    when it is unset. With several web workers (WEB_CONCURRENCY > 1, set by
+    gunicorn.conf) a poll may reach a worker that did not take the task, so
+    an in-process store is refused there.
+    """
+    backend = os.environ.get('TASK_QUEUE_BACKEND', 'process')
+    store_dir = os.environ.get('TASK_STORE_DIR')
+    if backend not in ('process', 'thread'):
+        raise ValueError(f"Unknown TASK_QUEUE_BACKEND: {backend}")
+    if not store_dir and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+        raise ValueError("TASK_STORE_DIR must be set when running more than one web worker")
+    return LocalTaskQueue(
+        workers=int(os.environ.get('TASK_WORKERS', 2)),
+        max_queue=int(os.environ.get('TASK_MAX_QUEUE', 100)),
+        use_processes=backend == 'process',
+        store=SQLiteTaskStore(store_dir) if store_dir else MemoryTaskStore()
+    )
@@ -1,7 +1,39 @@
 import unittest
+import gzip
 import json
-from app import app
-from nlp_processor import parse_resume_text, calculate_match_score, extract_skills
+import os
+import tempfile
+import threading
+import time
+import types
+import zlib
+from unittest import mock
+from flask import request
+from io import BytesIO
+import numpy as np
+from app import app, parse_cache, admission, parse_cache_key, taxonomy_reloader, cached_pdf_text, near_duplicate_index
+from parse_cache import ParseCache, cache_key
+from vector_index import VectorIndex
+from job_registry import JobRegistry
+from document import Document
+from segmentation import segment_sections
+from task_queue import LocalTaskQueue, QueueFullError, SQLiteTaskStore, callback_url_allowed, create_task_queue
+from profiling import RequestProfiler, collapsed_stacks
+from near_duplicates import NearDuplicateIndex, minhash_signature
+from single_flight import SingleFlight, WaitTimeout
+from admission import AdmissionController, QueueFull, DeadlineExceeded, set_deadline, clear_deadline
+from cpu_pool import CpuPool
+import serialization
+import nlp_processor
+import pdf_extraction
+from benchmarks.corpus import make_pdf, generate_job, generate_resume
+from benchmarks.run import compare, function_benchmarks, missing_from_baseline, summarize
+from skill_taxonomy import SkillTaxonomy, TaxonomyReloader, current_taxonomy, activate
+from nlp_processor import (parse_resume_text, calculate_match_score, extract_skills, rank_resumes,
+                           parse_resume_batch, calculate_skill_match, extract_text_from_pdf, warm_up,
+                           shortlist_resumes, calculate_text_similarity, job_artifacts, TFIDF_PARAMS)
+from job_cache import JobArtifactCache
+from sklearn.feature_extraction.text import TfidfVectorizer
 
 class TestMLEngine(unittest.TestCase):
     
@@ -65,6 +97,122 @@ class TestMLEngine(unittest.TestCase):
         self.assertIn('react', skills)
         self.assertIn('aws', skills)
     
+    def test_skill_extraction_word_boundaries(self):
+        """Test short skills only match as whole words"""
+        skills = extract_skills("Experienced in JavaScript, Node.js, C++ and Power BI; managed the rest-api rollout")
+        
+        self.assertIn('javascript', skills)
+        self.assertIn('node.js', skills)
+        self.assertIn('c++', skills)
+        self.assertIn('power bi', skills)
+        self.assertNotIn('java', skills)
+        self.assertNotIn('r', skills)
+        self.assertNotIn('go', skills)
+    
+    def test_taxonomy_loads_from_versioned_file(self):
+        """Test taxonomy is compiled from the versioned data file"""
+        self.assertTrue(current_taxonomy().version)
+        self.assertIn('kubernetes', current_taxonomy().skills)
+        self.assertEqual(current_taxonomy().find_skills('Docker and docker'), ['docker'])
+    
+    def test_parse_resume_batch(self):
+        """Test batched parsing matches single-document parsing"""
+        texts = [
+            'Python developer with 4 years of experience',
+            '',
+            'Bachelor in Computer Science, skilled in Docker and Kubernetes'
+        ]
+        
+        results = parse_resume_batch(texts, batch_size=2)
+        
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], parse_resume_text(texts[0]))
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['skills'], parse_resume_text(texts[2])['skills'])
+    
+    def test_skill_match_uses_canonical_ids(self):
+        """Test aliases match and substrings no longer do"""
+        percentage, matched, missing = calculate_skill_match(
+            ['JavaScript', 'nodejs', 'K8s'],
+            ['Java', 'Node.js', 'Kubernetes', 'node.js']
+        )
+        
+        self.assertEqual(matched, ['Node.js', 'Kubernetes'])
+        self.assertEqual(missing, ['Java'])
+        self.assertAlmostEqual(percentage, 200 / 3)
+    
+    def test_skill_match_weights(self):
+        """Test optional per-skill weights"""
+        percentage, matched, _ = calculate_skill_match(
+            ['python'], ['Python', 'Excel'], skill_weights={'python': 3, 'excel': 1}
+        )
+        
+        self.assertEqual(matched, ['Python'])
+        self.assertEqual(percentage, 75)
+    
+    def test_invalid_skill_weights_are_rejected(self):
+        """Test non-numeric and non-positive skill weights get a 400 on every matching endpoint"""
+        match = {'resumeText': 'Python developer', 'jobText': 'Python and Go engineer', 'jobSkills': ['python', 'go']}
+        rank = {'jobText': 'Python and Go engineer', 'jobSkills': ['python', 'go'],
+                'resumes': [{'id': 1, 'resumeText': 'Python developer'}]}
+        for weights in [{'python': 'high'}, {'go': -1}, {'go': 0}, {'python': True}, ['python']]:
+            for path, body in [('/api/ml/calculate-match', match), ('/api/ml/rank', rank),
+                               ('/api/ml/shortlist', dict(rank, k=1))]:
+                response = self.app.post(path, data=json.dumps(dict(body, skillWeights=weights)),
+                                         content_type='application/json')
+                self.assertEqual(response.status_code, 400, (path, weights))
+            header = {'jobText': 'Python engineer', 'skillWeights': weights}
+            response = self.app.post('/api/ml/bulk/match', data=json.dumps(header),
+                                     content_type='application/x-ndjson')
+            self.assertEqual(response.status_code, 400)
+        
+        response = self.app.post('/api/ml/calculate-match', data=json.dumps(dict(match, skillWeights={'python': 2.5})),
+                                 content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_document_caches_stages(self):
+        """Test a Document computes each preprocessing stage once"""
+        document = Document("Senior C++ / CI/CD engineer, 7 years of experience!")
+        
+        self.assertIs(document.cleaned, document.cleaned)
+        self.assertIs(document.tokens, document.tokens)
+        self.assertEqual(document.cleaned, "Senior C++ / CI/CD engineer 7 years of experience")
+        self.assertIn('ci/cd', extract_skills(document))
+        self.assertEqual(parse_resume_text(document), parse_resume_text(document.text))
+        self.assertFalse(hasattr(document, '__dict__'))
+    
+    def test_section_segmentation(self):
+        """Test header detection splits a resume into sections"""
+        resume = "\n".join([
+            "Jane Doe",
+            "Backend engineer with 8 years of experience",
+            "WORK EXPERIENCE",
+            "Led a team of 4 at a university spin-off",
+            "Education:",
+            "Master of Science in Data Engineering, Tech Institute",
+            "Skills: Python, Go"
+        ])
+        
+        sections = segment_sections(resume)
+        
+        self.assertEqual(set(sections), {'summary', 'experience', 'education', 'skills'})
+        self.assertEqual(sections['skills'], 'Python, Go')
+        self.assertNotIn('university', sections['education'].lower())
+        
+        result = parse_resume_text(resume)
+        self.assertEqual(result['experience'], '8+ years')
+        self.assertEqual(result['education'], ['Science In Data Engineering'])
+        self.assertEqual(segment_sections("Python developer\nwith 5 years"), {})
+        
+        # Without the extractor's own section, the whole text is searched rather than the preamble
+        self.assertEqual(parse_resume_text("Jane Doe\nSkills: Python, AWS\n"
+                                           "I have 7 years of experience building backends.")['experience'], '7+ years')
+        self.assertEqual(parse_resume_text("Jane Doe\njane@example.com\nProjects\n"
+                                           "Payments platform, built over 6 years of work")['experience'], '6+ years')
+        self.assertEqual(parse_resume_text("Jane Doe\nSkills: Python\n"
+                                           "Bachelor of Science in Physics, State College")['education'],
+                         ['Science In Physics'])
+    
     def test_match_calculation(self):
         """Test match score calculation"""
         resume_text = "Python developer with React experience"
@@ -78,5 +226,952 @@ class TestMLEngine(unittest.TestCase):
         self.assertIn('matched_skills', result)
         self.assertIn('suggestions', result)
 
+    def test_rank_resumes(self):
+        """Test batch ranking orders resumes by match score"""
+        job_text = "Looking for Python and React developer with AWS experience"
+        resumes = [
+            {'id': 'weak', 'text': 'Accountant with Excel and bookkeeping background', 'skills': ['Excel']},
+            {'id': 'strong', 'text': 'Python developer building React apps on AWS', 'skills': ['Python', 'React', 'AWS']},
+            {'id': 'partial', 'text': 'Python developer', 'skills': ['Python']}
+        ]
+        
+        result = rank_resumes(job_text, ["Python", "React", "AWS"], resumes)
+        
+        ids = [entry['id'] for entry in result['results']]
+        self.assertEqual(ids, ['strong', 'partial', 'weak'])
+        self.assertIn('match_score', result['results'][0])
+        self.assertEqual(result['results'][0]['missing_skills'], [])
+    
+    def test_rank_scores_do_not_depend_on_the_batch(self):
+        """Test a resume's rank score equals calculate_match_score whatever else is in the batch"""
+        job_text, job_skills = generate_job(2)
+        resumes = [{'id': i, 'text': generate_resume(i), 'skills': ['python']} for i in range(6)]
+        
+        alone = rank_resumes(job_text, job_skills, resumes[:1])['results'][0]
+        together = {result['id']: result for result in rank_resumes(job_text, job_skills, resumes)['results']}
+        self.assertEqual(together[0], alone)
+        self.assertEqual(alone['match_score'],
+                         calculate_match_score(resumes[0]['text'], job_text, job_skills, ['python'])['match_score'])
+    
+    def test_shortlist_matches_exhaustive_scoring(self):
+        """Test the pruned shortlist equals scoring every resume and keeping the top k"""
+        job_text, job_skills = generate_job(1)
+        resumes = [{'id': i, 'text': generate_resume(i)} for i in range(40)]
+        resumes.append({'id': 'copy', 'text': resumes[3]['text']})
+        resumes.append({'id': 'empty', 'text': ''})
+        
+        exhaustive = []
+        for resume in resumes[:-1]:
+            result = calculate_match_score(resume['text'], job_text, job_skills)
+            result['id'] = resume['id']
+            exhaustive.append(result)
+        exhaustive.sort(key=lambda result: (result['match_score'], result['text_similarity']), reverse=True)
+        
+        for k in (1, 3, 10, 50):
+            shortlist = shortlist_resumes(job_text, job_skills, resumes, k)
+            self.assertEqual(shortlist['results'], exhaustive[:k])
+            self.assertEqual(shortlist['candidates'], 41)
+        self.assertLess(shortlist_resumes(job_text, job_skills, resumes, 1)['scored'], 41)
+        
+        response = self.app.post('/api/ml/shortlist',
+                                 data=json.dumps({'jobText': job_text, 'jobSkills': job_skills, 'k': 2,
+                                                  'resumes': [{'id': r['id'], 'resumeText': r['text']} for r in resumes]}),
+                                 content_type='application/json')
+        data = json.loads(response.data)
+        self.assertEqual([entry['id'] for entry in data['results']], [r['id'] for r in exhaustive[:2]])
+    
+    def test_rank_endpoint(self):
+        """Test batch ranking endpoint"""
+        test_data = {
+            'jobText': 'Looking for Python developer with React skills',
+            'jobSkills': ['Python', 'React'],
+            'resumes': [
+                {'id': 'a', 'resumeText': 'Java developer', 'resumeSkills': ['Java']},
+                {'id': 'b', 'resumeText': 'Python and React engineer', 'resumeSkills': ['Python', 'React']}
+            ]
+        }
+        
+        response = self.app.post('/api/ml/rank',
+                               data=json.dumps(test_data),
+                               content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        
+        data = json.loads(response.data)
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['results'][0]['id'], 'b')
+        self.assertIn('matchedSkills', data['results'][0])
+
+    def test_parse_cache_lru_and_disk_tier(self):
+        """Test LRU eviction and persistence across cache instances"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ParseCache(max_entries=2, cache_dir=cache_dir)
+            for i in range(3):
+                cache.set(cache_key('parse', f'text {i}'), {'skills': [str(i)]})
+            
+            stats = cache.stats()
+            self.assertEqual(stats['size'], 2)
+            self.assertEqual(stats['evictions'], 1)
+            
+            # A fresh instance (e.g. a restarted worker) reads from SQLite
+            restarted = ParseCache(max_entries=2, cache_dir=cache_dir)
+            self.assertEqual(restarted.get(cache_key('parse', 'text 0')), {'skills': ['0']})
+            self.assertIsNone(restarted.get(cache_key('parse', 'unknown')))
+            self.assertEqual(restarted.stats()['diskHits'], 1)
+            self.assertEqual(restarted.stats()['misses'], 1)
+            
+            # The disk tier keeps only the most recently written rows
+            capped = ParseCache(max_entries=1, cache_dir=cache_dir, max_disk_entries=2)
+            capped.set(cache_key('parse', 'text 3'), {'skills': ['3']})
+            self.assertEqual(capped.stats()['diskEvictions'], 2)
+            self.assertEqual(capped.stats()['maxDiskEntries'], 2)
+            reopened = ParseCache(max_entries=1, cache_dir=cache_dir)
+            self.assertIsNone(reopened.get(cache_key('parse', 'text 1')))
+            self.assertEqual(reopened.get(cache_key('parse', 'text 2')), {'skills': ['2']})
+    
+    def test_ready_endpoint_after_warm_up(self):
+        """Test readiness is reported separately from health once models are warm"""
+        warm_up()
+        response = self.app.get('/api/ml/ready')
+        self.assertEqual(response.status_code, 200)
+        status = json.loads(response.data)
+        self.assertTrue(status['ready'])
+        self.assertEqual(status['taxonomyVersion'], current_taxonomy().version)
+        self.assertIn('nerAvailable', status)
+    
+    def test_parse_endpoint_uses_cache(self):
+        """Test repeated parse requests are served from the cache"""
+        parse_cache.clear()
+        test_data = {'resume_text': 'Cached resume for a Go and Rust engineer'}
+        
+        for _ in range(2):
+            response = self.app.post('/api/ml/parse-resume',
+                                   data=json.dumps(test_data),
+                                   content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+        
+        stats = json.loads(self.app.get('/api/ml/cache/stats').data)
+        self.assertGreaterEqual(stats['hits'], 1)
+
+    def test_resume_index_incremental_and_persistent(self):
+        """Test add/remove, top-k order and reload from disk"""
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = VectorIndex(index_dir, compact_every=3)
+            index.add([('1', 'Python developer on AWS'), ('2', 'Java Spring engineer'),
+                       ('3', 'Accountant with Excel')])
+            index.add([('4', 'Senior Python AWS Docker engineer')])
+            self.assertEqual(index.remove(['2', 'missing']), 1)
+            
+            # Another process sees the compacted matrix plus the journal
+            reloaded = VectorIndex(index_dir)
+            self.assertEqual(len(reloaded), 3)
+            self.assertNotIn('2', reloaded)
+            
+            results = reloaded.search('Python AWS', k=2)
+            self.assertEqual({resume_id for resume_id, _ in results}, {'1', '4'})
+            self.assertGreaterEqual(results[0][1], results[1][1])
+            
+            # An unchanged manifest is not parsed again on every call
+            with mock.patch.object(reloaded, '_read_manifest', wraps=reloaded._read_manifest) as read_manifest:
+                len(reloaded), reloaded.search('Python', k=1), reloaded.stats()
+                self.assertEqual(read_manifest.call_count, 0)
+                index.compact()
+                self.assertEqual(len(reloaded), 3)
+                self.assertEqual(read_manifest.call_count, 1)
+    
+    def test_index_needs_a_directory_with_several_workers(self):
+        """Test an in-memory index is refused when several web workers would each hold their own"""
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '2'}):
+            os.environ.pop('RESUME_INDEX_DIR', None)
+            with self.assertRaises(ValueError):
+                VectorIndex.from_env('RESUME_INDEX')
+            with tempfile.TemporaryDirectory() as tmp:
+                os.environ['RESUME_INDEX_DIR'] = tmp
+                first, second = VectorIndex.from_env('RESUME_INDEX'), VectorIndex.from_env('RESUME_INDEX')
+                first.add([('r1', 'Python developer')])
+                self.assertEqual(second.search('Python', k=1)[0][0], 'r1')
+    
+    def test_job_registry_is_shared_between_workers(self):
+        """Test a job registered through one worker's registry is recommended by another's"""
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '2'}):
+            os.environ.pop('JOB_INDEX_DIR', None)
+            with self.assertRaises(ValueError):
+                JobRegistry.from_env()
+            with tempfile.TemporaryDirectory() as tmp:
+                os.environ['JOB_INDEX_DIR'] = tmp
+                first, second = JobRegistry.from_env(), JobRegistry.from_env()
+                first.register('j1', 'Python backend engineer', ['python'])
+                self.assertEqual(second.recommend('Python developer', ['python'], 1)[0]['job_id'], 'j1')
+    
+    def test_in_memory_index_compacts(self):
+        """Test an index without a directory folds added rows into its base matrix"""
+        index = VectorIndex(compact_every=3)
+        words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf']
+        for i, word in enumerate(words):
+            index.add([(str(i), f'Python developer {word}', {'n': i})])
+        index.remove(['0'])
+        stats = index.stats()
+        self.assertEqual((stats['size'], stats['baseRows'], stats['journalEntries']), (6, 6, 2))
+        
+        index.compact()
+        self.assertEqual((index.stats()['baseRows'], index.stats()['journalEntries']), (6, 0))
+        self.assertEqual(index.get_meta('6'), {'n': 6})
+        self.assertEqual(index.search('echo developer', k=1)[0][0], '4')
+    
+    def test_search_endpoint(self):
+        """Test indexing resumes and searching the index by job text"""
+        test_data = {
+            'resumes': [
+                {'id': 'py', 'resumeText': 'Python and React developer'},
+                {'id': 'acct', 'resumeText': 'Accountant with payroll background'}
+            ]
+        }
+        response = self.app.post('/api/ml/index/resumes',
+                               data=json.dumps(test_data),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.app.post('/api/ml/search',
+                               data=json.dumps({'jobText': 'React developer', 'k': 1}),
+                               content_type='application/json')
+        data = json.loads(response.data)
+        self.assertEqual(data['results'][0]['id'], 'py')
+        
+        response = self.app.delete('/api/ml/index/resumes/py')
+        self.assertEqual(response.status_code, 200)
+        response = self.app.delete('/api/ml/index/resumes/py')
+        self.assertEqual(response.status_code, 404)
+
+    def test_job_registry_recommend(self):
+        """Test one resume is scored against all registered jobs"""
+        registry = JobRegistry()
+        registry.register('backend', 'Python backend engineer with AWS and Docker', ['Python', 'AWS', 'Docker'])
+        registry.register('frontend', 'React frontend developer with TypeScript', ['React', 'TypeScript'])
+        registry.register('finance', 'Accountant for payroll and tax', ['Excel', 'Accounting'])
+        registry.register('finance', 'Senior accountant for payroll and tax', ['Excel', 'Accounting'])
+        
+        results = registry.recommend('Python developer deploying Docker services to AWS',
+                                     ['python', 'aws', 'docker'], k=2)
+        
+        self.assertEqual(len(registry), 3)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['job_id'], 'backend')
+        self.assertEqual(results[0]['missing_skills'], [])
+        self.assertEqual(results[0]['skill_match_percentage'], 100)
+    
+    def test_recommend_jobs_endpoint(self):
+        """Test jobs registered via analyze-job are recommended"""
+        for job_id, job_text in (('j1', 'Python developer with Django'), ('j2', 'Nurse for night shifts')):
+            response = self.app.post('/api/ml/analyze-job',
+                                   data=json.dumps({'jobId': job_id, 'jobText': job_text}),
+                                   content_type='application/json')
+            self.assertTrue(json.loads(response.data)['registered'])
+        
+        response = self.app.post('/api/ml/recommend-jobs',
+                               data=json.dumps({'resumeText': 'Django and Python engineer', 'k': 1}),
+                               content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['results'][0]['jobId'], 'j1')
+        self.assertIn('python', data['results'][0]['matchedSkills'])
+
+    def test_extract_text_from_pdf_pages(self):
+        """Test page-parallel extraction keeps page order and honours max_pages"""
+        pdf_bytes = make_pdf([[f'Page {i} Python'] for i in range(4)])
+        
+        parallel = extract_text_from_pdf(pdf_bytes, workers=2)
+        sequential = extract_text_from_pdf(pdf_bytes, workers=0)
+        
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(parallel.split('\n'), [f'Page {i} Python' for i in range(4)])
+        self.assertEqual(extract_text_from_pdf(pdf_bytes, max_pages=2, workers=0), 'Page 0 Python\nPage 1 Python')
+    
+    def test_pdf_timeout_only_kills_its_own_workers(self):
+        """Test a document timing out does not cut short another one extracting concurrently"""
+        slow_pdf = make_pdf([[f'Slow page {i}'] for i in range(4)])
+        healthy_pdf = make_pdf([[f'Page {i} Python'] for i in range(2)])
+        real_extract_pages = pdf_extraction.extract_pages
+        
+        def extract_pages(pdf_bytes, start, stop, deadline=None):
+            # Runs in the forked workers: the slow document hangs, the healthy one takes a moment
+            time.sleep(30 if pdf_bytes == slow_pdf else 1)
+            return real_extract_pages(pdf_bytes, start, stop, deadline)
+        
+        slow_result = []
+        with mock.patch.object(pdf_extraction, 'extract_pages', extract_pages):
+            slow = threading.Thread(target=lambda: slow_result.append(
+                pdf_extraction.extract_pdf_text(slow_pdf, timeout=0.3, workers=2)))
+            slow.start()
+            healthy = pdf_extraction.extract_pdf_text(healthy_pdf, timeout=20, workers=2)
+            slow.join()
+        
+        self.assertEqual(slow_result, [''])
+        self.assertEqual(healthy, 'Page 0 Python\nPage 1 Python')
+    
+    def test_pdf_page_count_is_bounded_by_the_timeout(self):
+        """Test a PDF that hangs while being opened is given up on at the timeout"""
+        pdf_bytes = make_pdf([['Hanging page count']])
+        
+        def count_pages(pdf_bytes):
+            time.sleep(30)
+        
+        with mock.patch.object(pdf_extraction, 'count_pages', count_pages):
+            started = time.time()
+            self.assertEqual(pdf_extraction.extract_pdf(pdf_bytes, timeout=0.3, workers=2), ('', False))
+            self.assertLess(time.time() - started, 10)
+    
+    def test_partial_pdf_text_is_not_cached(self):
+        """Test single-page PDFs are bounded by the timeout and partial text is never cached"""
+        pdf_bytes = make_pdf([['Timeout test: Kotlin engineer']])
+        real_extract_pages = pdf_extraction.extract_pages
+        
+        def extract_pages(pdf_bytes, start, stop, deadline=None):
+            time.sleep(30)
+            return real_extract_pages(pdf_bytes, start, stop, deadline)
+        
+        with mock.patch.object(pdf_extraction, 'extract_pages', extract_pages), \
+                mock.patch.object(pdf_extraction, 'PDF_TIMEOUT', 0.3):
+            started = time.time()
+            self.assertEqual(pdf_extraction.extract_pdf(pdf_bytes, workers=0), ('', False))
+            self.assertLess(time.time() - started, 10)
+            with mock.patch('app.PDF_TIMEOUT', 0.3):
+                self.assertEqual(cached_pdf_text(pdf_bytes), '')
+        
+        self.assertIsNone(parse_cache.get(cache_key('pdf', pdf_bytes, (pdf_extraction.PDF_MAX_PAGES,))))
+        self.assertEqual(cached_pdf_text(pdf_bytes), 'Timeout test: Kotlin engineer')
+        self.assertEqual(parse_cache.get(cache_key('pdf', pdf_bytes, (pdf_extraction.PDF_MAX_PAGES,))),
+                         'Timeout test: Kotlin engineer')
+    
+    def test_large_multipart_uploads_stay_in_memory(self):
+        """Test multipart file parts over Werkzeug's 500KB spool limit are kept in memory"""
+        with app.test_request_context('/api/ml/parse-resume', method='POST',
+                                      data={'file': (BytesIO(b'%PDF' + b'0' * 600000), 'resume.pdf')}):
+            self.assertIsInstance(request.files['file'].stream, BytesIO)
+    
+    def test_parse_resume_upload(self):
+        """Test multipart and raw PDF uploads are parsed in memory"""
+        pdf_bytes = make_pdf([['Jane Doe', 'Python engineer with 6 years of experience']])
+        
+        response = self.app.post('/api/ml/parse-resume',
+                               data={'file': (BytesIO(pdf_bytes), 'resume.pdf')},
+                               content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn('python', data['skills'])
+        self.assertEqual(data['experience'], '6+ years')
+        
+        response = self.app.post('/api/ml/parse-resume', data=pdf_bytes, content_type='application/pdf')
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.app.post('/api/ml/parse-resume', data=b'not a pdf', content_type='application/pdf')
+        self.assertEqual(response.status_code, 400)
+
+    def test_parse_task_submit_and_poll(self):
+        """Test background parsing returns a task ID and later a result"""
+        response = self.app.post('/api/ml/tasks/parse-resume',
+                               data=json.dumps({'resume_text': 'Kotlin developer with 3 years of experience'}),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        task_id = json.loads(response.data)['taskId']
+        
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            task = json.loads(self.app.get(f'/api/ml/tasks/{task_id}').data)
+            if task['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.05)
+        
+        self.assertEqual(task['status'], 'done')
+        self.assertIn('kotlin', task['result']['skills'])
+        self.assertEqual(self.app.get('/api/ml/tasks/unknown').status_code, 404)
+    
+    def test_task_callbacks_and_store_are_guarded(self):
+        """Test callback URLs must be on an allowed host and multi-worker setups need a shared store"""
+        allowed = {'backend', 'hooks.example.com'}
+        self.assertTrue(callback_url_allowed('http://backend:5000/api/tasks/done', allowed))
+        self.assertTrue(callback_url_allowed('https://HOOKS.example.com/done', allowed))
+        for url in ('http://169.254.169.254/latest/meta-data', 'http://localhost:6379/', 'file:///etc/passwd',
+                    'gopher://backend/', 'http://backend.evil.com/', 'http://backend:port/'):
+            self.assertFalse(callback_url_allowed(url, allowed), url)
+        
+        # No TASK_CALLBACK_HOSTS configured in tests, so callbacks are refused
+        response = self.app.post('/api/ml/tasks/parse-resume',
+                                 json={'resumeText': 'Go developer', 'callbackUrl': 'http://169.254.169.254/'})
+        self.assertEqual(response.status_code, 400)
+        
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '2', 'TASK_QUEUE_BACKEND': 'thread'}):
+            os.environ.pop('TASK_STORE_DIR', None)
+            with self.assertRaises(ValueError):
+                create_task_queue()
+            with tempfile.TemporaryDirectory() as tmp:
+                os.environ['TASK_STORE_DIR'] = tmp
+                self.assertIsInstance(create_task_queue().store, SQLiteTaskStore)
+    
+    def test_task_queue_bounded(self):
+        """Test a full queue rejects work and reports depth and wait time"""
+        release = threading.Event()
+        queue = LocalTaskQueue(workers=1, max_queue=2, use_processes=False)
+        
+        first = queue.submit(release.wait, 5)
+        queue.submit(release.wait, 5)
+        with self.assertRaises(QueueFullError):
+            queue.submit(release.wait, 5)
+        self.assertEqual(queue.stats()['queueDepth'], 2)
+        
+        release.set()
+        deadline = time.time() + 5
+        while queue.stats()['queueDepth'] and time.time() < deadline:
+            time.sleep(0.01)
+        
+        stats = queue.stats()
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(queue.get(first)['status'], 'done')
+        self.assertGreaterEqual(stats['waitSeconds']['max'], 0)
+    
+    def test_bulk_parse_streams_ndjson(self):
+        """Test bulk parse answers one line per document and a summary"""
+        body = '\n'.join([
+            json.dumps({'id': 'a', 'resumeText': 'Python and Docker engineer with 4 years of experience'}),
+            'not json',
+            json.dumps({'id': 'b', 'resumeText': ''}),
+            json.dumps({'id': 'c', 'resumeText': 'Go developer, Kubernetes'})
+        ])
+        response = self.app.post('/api/ml/bulk/parse', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual(lines[-1]['summary'], {'count': 4, 'errors': 2})
+        results = {line['id']: line for line in lines[:-1] if line.get('id')}
+        self.assertIn('docker', results['a']['skills'])
+        self.assertIn('error', results['b'])
+        self.assertIn('kubernetes', results['c']['skills'])
+        self.assertNotIn('rawText', results['a'])
+    
+    def test_bulk_ndjson_is_not_bounded_by_upload_limit(self):
+        """Test NDJSON bulk bodies stream past MAX_CONTENT_LENGTH while multipart ones get a 413"""
+        line = json.dumps({'resumeText': 'Python developer ' + 'x' * 200}) + '\n'
+        body = line * 20
+        with mock.patch.dict(app.config, {'MAX_CONTENT_LENGTH': len(body) // 4}):
+            response = self.app.post('/api/ml/bulk/parse', data=body, content_type='application/x-ndjson')
+            self.assertEqual(response.status_code, 200)
+            lines = [json.loads(line) for line in response.data.decode().splitlines()]
+            self.assertEqual(lines[-1]['summary'], {'count': 20, 'errors': 0})
+            
+            response = self.app.post('/api/ml/bulk/parse', content_type='multipart/form-data',
+                                     data={'files': (BytesIO(b'%PDF' + b'0' * len(body)), 'a.pdf')})
+            self.assertEqual(response.status_code, 413)
+    
+    def test_bulk_match_streams_ndjson(self):
+        """Test bulk match takes the job from the first line and keeps input order"""
+        body = '\n'.join([
+            json.dumps({'jobText': 'Python developer with Django', 'jobSkills': ['python', 'django']}),
+            json.dumps({'id': 1, 'resumeText': 'Java and Spring developer'}),
+            json.dumps({'id': 2, 'resumeText': 'Python developer with Django experience'})
+        ])
+        response = self.app.post('/api/ml/bulk/match', data=body, content_type='application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        
+        self.assertEqual([line['id'] for line in lines[:-1]], [1, 2])
+        self.assertGreater(lines[1]['score'], lines[0]['score'])
+        self.assertEqual(lines[-1]['summary']['errors'], 0)
+        
+        response = self.app.post('/api/ml/bulk/match', data='', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_metrics_endpoint(self):
+        """Test stage timings, request counters and document sizes are exported"""
+        self.app.post('/api/ml/calculate-match',
+                      data=json.dumps({'resumeText': 'Python developer, 3 years of experience',
+                                       'jobText': 'Python engineer', 'jobSkills': ['python']}),
+                      content_type='application/json')
+        response = self.app.get('/api/ml/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        
+        body = response.data.decode()
+        self.assertIn('# TYPE ml_stage_duration_seconds histogram', body)
+        for stage in ('clean_text', 'extract_skills_keyword', 'similarity', 'skill_match'):
+            self.assertIn(f'ml_stage_duration_seconds_count{{stage="{stage}"}}', body)
+        self.assertIn('ml_stage_duration_seconds_bucket{stage="skill_match",le="+Inf"}', body)
+        self.assertRegex(body, r'ml_requests_total\{endpoint="calculate_match_endpoint",method="POST",status="200"\} \d+')
+        self.assertIn('ml_requests_in_flight{endpoint="metrics_endpoint"} 1', body)
+        self.assertIn('ml_document_size_chars_count{kind="job"}', body)
+    
+    def test_request_profiler_writes_dumps(self):
+        """Test a profiled request writes .prof and serves folded stacks on demand"""
+        from flask import Flask
+        profiled_app = Flask('profiled')
+        profiled_app.add_url_rule('/parse', 'parse', lambda: parse_resume_text('Python developer with 5 years of experience'))
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            RequestProfiler(tmp).init_app(profiled_app)
+            client = profiled_app.test_client()
+            
+            self.assertNotIn('X-Profile-Id', client.get('/parse').headers)
+            profile_id = client.get('/parse', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+            
+            self.assertTrue(os.path.exists(os.path.join(tmp, profile_id + '.prof')))
+            # Folding happens when the profile is read, not on the request path
+            self.assertFalse(os.path.exists(os.path.join(tmp, profile_id + '.collapsed')))
+            self.assertIn(profile_id, client.get('/debug/profiles').get_json()['profiles'])
+            
+            stacks = client.get(f'/debug/profiles/{profile_id}').get_data(as_text=True)
+            self.assertIn('parse_resume_text', stacks)
+            self.assertRegex(stacks.splitlines()[0], r' \d+$')
+            self.assertTrue(os.path.exists(os.path.join(tmp, profile_id + '.collapsed')))
+            self.assertEqual(client.get('/debug/profiles/..%2Fetc').status_code, 404)
+    
+    def test_collapsed_stacks_bounded_on_shared_call_graphs(self):
+        """Test folding a call graph with exponentially many paths stays bounded"""
+        # 40 layers of two functions, each calling both functions of the next layer
+        layers = [[('mod.py', layer * 10 + i, f'f{layer}_{i}') for i in range(2)] for layer in range(40)]
+        root = ('mod.py', 0, 'root')
+        raw = {root: (1, 1, 0.001, 40.001, {})}
+        for depth, layer in enumerate(layers):
+            # Each function spends 0.5s itself plus half of each function below it
+            total = 0.5 * (40 - depth)
+            callers = {root: (1, 1, total, total)} if depth == 0 else \
+                {caller: (1, 1, total / 2, total / 2) for caller in layers[depth - 1]}
+            for func in layer:
+                raw[func] = (2, 2, 0.5, total, callers)
+        
+        started = time.perf_counter()
+        lines = collapsed_stacks(types.SimpleNamespace(stats=raw))
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertTrue(lines[0].startswith('root'))
+        folded_total = sum(int(line.rsplit(' ', 1)[1]) for line in lines)
+        self.assertAlmostEqual(folded_total / 1e6, 40.001, delta=0.01)
+    
+    def test_benchmark_corpus_and_baseline_compare(self):
+        """Test the synthetic corpus is deterministic and regressions are flagged"""
+        self.assertEqual(generate_resume(7, 'large'), generate_resume(7, 'large'))
+        self.assertNotEqual(generate_resume(7, 'large'), generate_resume(8, 'large'))
+        self.assertGreater(len(generate_resume(7, 'large')), len(generate_resume(7, 'small')))
+        job_text, job_skills = generate_job(3)
+        self.assertTrue(all(skill in job_text.lower() for skill in job_skills))
+        
+        baseline = {'benchmarks': {'parse': summarize([0.010] * 20, 0.2)}}
+        slower = {'benchmarks': {'parse': summarize([0.020] * 20, 0.4)}}
+        self.assertEqual(compare(baseline, baseline, 0.25), [])
+        regressions = compare(slower, baseline, 0.25)
+        self.assertEqual({r['metric'] for r in regressions}, {'p50Ms', 'p95Ms'})
+        self.assertEqual(regressions[0]['change'], 1.0)
+        
+        # New benchmarks are reported rather than silently passing
+        extended = {'benchmarks': dict(slower['benchmarks'], shortlist=summarize([0.010] * 20, 0.2))}
+        self.assertEqual(missing_from_baseline(extended, baseline), ['shortlist'])
+        self.assertEqual(missing_from_baseline(baseline, baseline), [])
+        
+        # The committed baseline covers every benchmark the suite defines
+        with open(os.path.join(os.path.dirname(__file__), 'benchmarks', 'baseline.json')) as f:
+            recorded = json.load(f)['benchmarks']
+        names = [benchmark.name for benchmark in function_benchmarks(10)]
+        self.assertEqual([name for name in names if name not in recorded], [])
+    
+    def test_near_duplicate_index(self):
+        """Test MinHash/LSH finds lightly edited copies but not different resumes"""
+        original = generate_resume(11)
+        edited = original.replace('Experience', 'Experience\nOpen to relocation', 1).replace('Summary', 'Profile', 1)
+        index = NearDuplicateIndex(threshold=0.8)
+        index.add('original', minhash_signature(original), {'id': 'a'})
+        index.add('other', minhash_signature(generate_resume(12)), {'id': 'b'})
+        
+        matches = index.query(minhash_signature(edited))
+        self.assertEqual([key for key, _, _ in matches], ['original'])
+        self.assertGreaterEqual(matches[0][1], 0.8)
+        self.assertEqual(index.query(minhash_signature(generate_resume(13))), [])
+        self.assertTrue(index.remove('original'))
+        self.assertEqual(index.query(minhash_signature(edited)), [])
+    
+    def test_bulk_paths_reuse_near_duplicate_results(self):
+        """Test the dedup endpoint and the dedup flag on bulk parse and match"""
+        original = generate_resume(21)
+        edited = original.replace('Summary', 'Profile', 1)
+        
+        response = self.app.post('/api/ml/dedup', data=json.dumps({'resumes': [
+            {'id': 'first', 'resumeText': original},
+            {'id': 'second', 'resumeText': edited},
+            {'id': 'third', 'resumeText': generate_resume(22)}
+        ]}), content_type='application/json')
+        data = json.loads(response.data)
+        self.assertEqual([result['duplicateOf'] for result in data['results']], [None, 'first', None])
+        self.assertEqual(data['duplicates'], 1)
+        
+        body = '\n'.join(json.dumps(line) for line in [
+            {'jobText': 'Python developer', 'jobSkills': ['python']},
+            {'id': 'm1', 'resumeText': generate_resume(23)},
+            {'id': 'm2', 'resumeText': generate_resume(23).replace('Summary', 'Profile', 1)}
+        ])
+        lines = [json.loads(line) for line in self.app.post('/api/ml/bulk/match?dedup=1', data=body,
+                                                            content_type='application/x-ndjson').data.splitlines()]
+        self.assertNotIn('duplicateOf', lines[0])
+        self.assertEqual(lines[1]['duplicateOf'], 'm1')
+        self.assertEqual(lines[1]['score'], lines[0]['score'])
+        
+        # Bulk match only deduplicates within its own request and leaves the shared index alone
+        index_size = len(near_duplicate_index)
+        body = '\n'.join(json.dumps(line) for line in [
+            {'jobText': 'Python developer', 'jobSkills': ['python']},
+            {'id': 'm3', 'resumeText': edited}
+        ])
+        lines = [json.loads(line) for line in self.app.post('/api/ml/bulk/match?dedup=1', data=body,
+                                                            content_type='application/x-ndjson').data.splitlines()]
+        self.assertNotIn('duplicateOf', lines[0])
+        self.assertEqual(len(near_duplicate_index), index_size)
+        
+        body = json.dumps({'id': 'p1', 'resumeText': edited + '\nReferences available'})
+        lines = [json.loads(line) for line in self.app.post('/api/ml/bulk/parse?dedup=true', data=body,
+                                                            content_type='application/x-ndjson').data.splitlines()]
+        self.assertEqual(lines[0]['duplicateOf'], 'first')
+    
+    def test_single_flight_coalesces_concurrent_calls(self):
+        """Test concurrent identical calls share one computation and its errors"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {'score': 42}
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('key', compute))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while flight.stats()['coalesced'] < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], [{'score': 42}] * 5)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True, True])
+        self.assertEqual(flight.stats(), {'executed': 1, 'coalesced': 4, 'retried': 0, 'inFlight': 0})
+        
+        # Nothing is cached once the call is done, and errors reach the caller
+        with self.assertRaises(ValueError):
+            flight.do('key', lambda: int('not a number'))
+        self.assertEqual(flight.do('key', lambda: 7), (7, False))
+    
+    def test_single_flight_waiters_keep_their_own_budget(self):
+        """Test waiters time out on their own budget and take over after a leader's deadline"""
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        
+        def slow_leader():
+            started.set()
+            release.wait(5)
+            raise DeadlineExceeded("leader ran out of time")
+        
+        errors = []
+        def lead():
+            try:
+                flight.do('key', slow_leader, unshared=(DeadlineExceeded,))
+            except DeadlineExceeded as e:
+                errors.append(e)
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait(5)
+        
+        # A waiter with a short budget stops waiting without the leader finishing
+        with self.assertRaises(WaitTimeout):
+            flight.do('key', lambda: 'unused', timeout=0.05, unshared=(DeadlineExceeded,))
+        
+        # A waiter with time left is not handed the leader's DeadlineExceeded; it runs itself
+        results = []
+        follower = threading.Thread(target=lambda: results.append(
+            flight.do('key', lambda: 'computed', timeout=5, unshared=(DeadlineExceeded,))))
+        follower.start()
+        deadline = time.time() + 5
+        while flight.stats()['coalesced'] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        leader.join()
+        follower.join()
+        
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, [('computed', False)])
+        self.assertEqual(flight.stats()['retried'], 1)
+    
+    def test_admission_controller_queue_and_shedding(self):
+        """Test the in-flight limit, the bounded wait queue and Retry-After hints"""
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+        first = controller.acquire()
+        
+        # The second request waits in the queue until the first finishes
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(controller.acquire()))
+        waiter.start()
+        deadline = time.time() + 5
+        while controller.stats()['queueDepth'] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        
+        # The queue is full, so a third is refused straight away
+        with self.assertRaises(QueueFull) as refused:
+            controller.acquire()
+        self.assertGreaterEqual(refused.exception.retry_after, 1)
+        
+        controller.release(first)
+        waiter.join()
+        self.assertEqual(len(admitted), 1)
+        with self.assertRaises(QueueFull):
+            controller.acquire(timeout=0.01)
+        controller.release(admitted[0])
+        
+        stats = controller.stats()
+        self.assertEqual((stats['admitted'], stats['queued'], stats['rejected'], stats['timedOut']), (2, 2, 1, 1))
+        self.assertEqual(stats['inFlight'], 0)
+    
+    def test_overload_returns_429_and_deadlines_504(self):
+        """Test shed requests get 429 with Retry-After, cheap endpoints still answer, and deadlines give 504"""
+        payload = {'resumeText': 'Python developer', 'jobText': 'Python engineer', 'jobSkills': ['Python']}
+        limits = (admission.max_in_flight, admission.max_queue)
+        admission.max_in_flight = admission.max_queue = 0
+        try:
+            response = self.app.post('/api/ml/calculate-match', json=payload)
+            self.assertEqual(response.status_code, 429)
+            self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+            self.assertEqual(self.app.get('/api/ml/health').status_code, 200)
+        finally:
+            admission.max_in_flight, admission.max_queue = limits
+        
+        response = self.app.post('/api/ml/calculate-match', json=payload, headers={'X-Request-Timeout': '0.000001'})
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(self.app.post('/api/ml/calculate-match', json=payload).status_code, 200)
+        for path, body in (('/api/ml/analyze-job', {'jobText': 'Deadline test: Rust engineer'}),
+                           ('/api/ml/recommend-jobs', {'resumeText': 'Deadline test: Go developer'})):
+            response = self.app.post(path, json=body, headers={'X-Request-Timeout': '0.000001'})
+            self.assertEqual(response.status_code, 504, path)
+        self.assertEqual(self.app.get('/api/ml/admission/stats').get_json()['inFlight'], 0)
+    
+    def test_batch_work_stops_at_the_deadline(self):
+        """Test a rank request whose deadline passes mid-batch returns 504 without finishing the batch"""
+        import nlp_processor
+        real_build = nlp_processor.build_match_result
+        built = []
+        
+        def slow_build(*args, **kwargs):
+            built.append(1)
+            time.sleep(0.01)
+            return real_build(*args, **kwargs)
+        
+        resumes = [{'id': i, 'resumeText': f'Python developer {i}', 'resumeSkills': ['python']} for i in range(200)]
+        with mock.patch.object(nlp_processor, 'build_match_result', slow_build):
+            started = time.time()
+            response = self.app.post('/api/ml/rank', json={'jobText': 'Python engineer', 'jobSkills': ['python'],
+                                                           'resumes': resumes}, headers={'X-Request-Timeout': '0.2'})
+        self.assertEqual(response.status_code, 504)
+        self.assertLess(time.time() - started, 1.5)
+        self.assertLess(len(built), 200)
+    
+    def test_cpu_pool_runs_stages_in_worker_processes(self):
+        """Test offloaded stages return the inline result and stop waiting at the deadline"""
+        pool = CpuPool(workers=1)
+        text = 'Senior Python developer with Docker and AWS experience'
+        self.assertEqual(pool.run(parse_resume_text, text), parse_resume_text(text))
+        
+        set_deadline(time.time() + 0.05)
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                pool.run(time.sleep, 2)
+        finally:
+            clear_deadline()
+
+    def test_response_projection_and_compression(self):
+        """Test ?fields= drops large fields and gzip/deflate are negotiated by Accept-Encoding"""
+        text = 'Python developer with Docker and AWS experience. ' * 200
+        response = self.app.post('/api/ml/parse-resume?fields=skills,textLength', json={'resume_text': text})
+        self.assertEqual(set(response.get_json()), {'skills', 'textLength'})
+        # Errors are never projected away
+        response = self.app.post('/api/ml/parse-resume?fields=skills', json={'resume_text': ' '})
+        self.assertIn('error', response.get_json())
+        
+        full = self.app.post('/api/ml/parse-resume', json={'resume_text': text})
+        self.assertNotIn('Content-Encoding', full.headers)
+        gzipped = self.app.post('/api/ml/parse-resume', json={'resume_text': text}, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzipped.headers['Content-Encoding'], 'gzip')
+        self.assertLess(len(gzipped.data), len(full.data))
+        self.assertEqual(json.loads(gzip.decompress(gzipped.data)), full.get_json())
+        deflated = self.app.post('/api/ml/parse-resume', json={'resume_text': text},
+                                 headers={'Accept-Encoding': 'deflate'})
+        self.assertEqual(json.loads(zlib.decompress(deflated.data)), full.get_json())
+        
+        # numpy values from the scoring code encode like plain numbers
+        self.assertEqual(json.loads(app.json.dumps({'score': np.float64(0.5), 'ids': np.arange(2)})),
+                         {'score': 0.5, 'ids': [0, 1]})
+    
+    @unittest.skipIf(serialization.msgpack is None, "msgpack is not installed")
+    def test_msgpack_content_negotiation(self):
+        """Test clients preferring MessagePack get it, with the same content as JSON"""
+        payload = {'resumeText': 'Python developer', 'jobText': 'Python engineer', 'jobSkills': ['Python']}
+        response = self.app.post('/api/ml/calculate-match', json=payload, headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response.mimetype, 'application/msgpack')
+        expected = self.app.post('/api/ml/calculate-match', json=payload).get_json()
+        self.assertEqual(serialization.msgpack.unpackb(response.data), expected)
+
+    def write_taxonomy(self, path, version, text_weight=0.4, skill_weight=0.6):
+        with open(path, 'w') as f:
+            json.dump({'version': version, 'technical': ['python', 'rust'], 'soft': ['leadership'],
+                       'aliases': {'py': 'python'},
+                       'scoring': {'textWeight': text_weight, 'skillWeight': skill_weight}}, f)
+    
+    def test_taxonomy_hot_reload_swaps_atomically(self):
+        """Test an edited config file is picked up, and a broken one leaves the active config in place"""
+        original = current_taxonomy()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'taxonomy.json')
+            self.write_taxonomy(path, 'test.1')
+            reloader = TaxonomyReloader(path, interval=0.001)
+            try:
+                first = reloader.reload()
+                self.assertIs(current_taxonomy(), first)
+                self.assertEqual(first.find_skills('Py and Rust'), ['python', 'rust'])
+                with self.assertRaises(TypeError):
+                    first.aliases['go'] = 'go'
+                
+                time.sleep(0.01)
+                self.assertIsNone(reloader.maybe_reload())
+                self.write_taxonomy(path, 'test.2', text_weight=0.5, skill_weight=0.5)
+                time.sleep(0.01)
+                second = reloader.maybe_reload()
+                self.assertEqual((second.version, second.text_weight), ('test.2', 0.5))
+                self.assertIs(current_taxonomy(), second)
+                self.assertEqual(first.version, 'test.1')
+                
+                # Invalid weights are rejected; the working config stays active
+                self.write_taxonomy(path, 'test.3', text_weight=-1)
+                time.sleep(0.01)
+                self.assertIsNone(reloader.maybe_reload())
+                self.assertIs(current_taxonomy(), second)
+            finally:
+                activate(original)
+    
+    def test_batch_scoring_uses_one_taxonomy(self):
+        """Test a config reload in the middle of a rank or shortlist does not mix scoring weights"""
+        original = current_taxonomy()
+        skills_only = SkillTaxonomy('skills-only', original.technical_skills, original.soft_skills,
+                                    original.aliases, text_weight=0, skill_weight=1)
+        real_generate_suggestions = nlp_processor.generate_suggestions
+        
+        def generate_suggestions(*args):
+            # Each result assembled swaps in the other config
+            activate(skills_only)
+            return real_generate_suggestions(*args)
+        
+        resumes = [{'id': i, 'text': 'Python developer building Django services'} for i in range(3)]
+        try:
+            with mock.patch.object(nlp_processor, 'generate_suggestions', generate_suggestions):
+                ranked = rank_resumes('Python engineer for Django APIs', ['python', 'aws'], resumes)['results']
+                activate(original)
+                shortlist = shortlist_resumes('Python engineer for Django APIs', ['python', 'aws'], resumes, 3)
+        finally:
+            activate(original)
+        
+        self.assertEqual(len({result['match_score'] for result in ranked}), 1)
+        self.assertEqual(len({result['match_score'] for result in shortlist['results']}), 1)
+        self.assertLess(ranked[0]['match_score'], 50)
+    
+    def test_reload_config_endpoint_changes_weights_and_cache_keys(self):
+        """Test the admin reload applies new weights and moves parse results to new cache keys"""
+        original = current_taxonomy()
+        original_path = taxonomy_reloader.path
+        payload = {'resumeText': 'Python developer', 'jobText': 'Rust engineer', 'jobSkills': ['Python']}
+        key_before = parse_cache_key('Python developer')
+        with tempfile.TemporaryDirectory() as tmp:
+            taxonomy_reloader.path = os.path.join(tmp, 'taxonomy.json')
+            try:
+                self.write_taxonomy(taxonomy_reloader.path, 'skills-only', text_weight=0, skill_weight=1)
+                response = self.app.post('/api/ml/admin/reload-config')
+                self.assertEqual(response.status_code, 200)
+                body = response.get_json()
+                self.assertEqual((body['version'], body['previousVersion'], body['changed']),
+                                 ('skills-only', original.version, True))
+                self.assertEqual(self.app.get('/api/ml/admin/config').get_json()['skillWeight'], 1.0)
+                self.assertEqual(self.app.post('/api/ml/calculate-match', json=payload).get_json()['score'], 100)
+                self.assertNotEqual(parse_cache_key('Python developer'), key_before)
+                
+                with open(taxonomy_reloader.path, 'w') as f:
+                    f.write('{not json')
+                response = self.app.post('/api/ml/admin/reload-config')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(current_taxonomy().version, 'skills-only')
+            finally:
+                taxonomy_reloader.path = original_path
+                activate(original)
+        self.assertEqual(parse_cache_key('Python developer'), key_before)
+
+    def test_near_duplicate_parse_results_follow_taxonomy_reloads(self):
+        """Test near-duplicates do not reuse a parse result from before a taxonomy reload"""
+        original = current_taxonomy()
+        resume = generate_resume(31) + '\nAlso writes Rust and Kotlin services'
+        
+        def bulk_parse(resume_id, text):
+            body = json.dumps({'id': resume_id, 'resumeText': text})
+            return json.loads(self.app.post('/api/ml/bulk/parse?dedup=1', data=body,
+                                            content_type='application/x-ndjson').data.splitlines()[0])
+        
+        first = bulk_parse('r1', resume)
+        self.assertNotIn('duplicateOf', first)
+        self.assertTrue(set(first['skills']) - {'python', 'rust', 'leadership'})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'taxonomy.json')
+            self.write_taxonomy(path, 'dedup-reload')
+            try:
+                TaxonomyReloader(path).reload()
+                line = bulk_parse('r2', resume.replace('Summary', 'Profile', 1))
+            finally:
+                activate(original)
+        self.assertEqual(line['duplicateOf'], 'r1')
+        # Parsed again with the reloaded taxonomy, which only knows three skills
+        self.assertIn('rust', line['skills'])
+        self.assertLessEqual(set(line['skills']), {'python', 'rust', 'leadership'})
+    
+    def test_text_similarity_matches_pairwise_tfidf_fit(self):
+        """Test the count-based similarity equals fitting TF-IDF on the pair, vocabulary cap included"""
+        pairs = [(generate_resume(seed, size), generate_job(seed, job_size)[0])
+                 for seed, size, job_size in [(1, 'small', 'small'), (2, 'medium', 'medium'), (3, 'xlarge', 'medium'),
+                                              (4, 'xlarge', 'xlarge')]]
+        pairs.append(('the and of', 'python developer'))
+        for resume, job in pairs:
+            try:
+                matrix = TfidfVectorizer(max_features=1000, **TFIDF_PARAMS).fit_transform([resume, job])
+                expected = min(max(matrix[0].multiply(matrix[1]).sum(), 0.0), 1.0)
+            except ValueError:
+                expected = 0.0
+            self.assertAlmostEqual(calculate_text_similarity(resume, job), expected, places=12)
+    
+    def test_job_artifact_cache_reuses_and_invalidates(self):
+        """Test jobId matches reuse job artifacts, give identical results, and rebuild on changed content"""
+        cache = JobArtifactCache(max_entries=2)
+        job_text, job_skills = generate_job(7)
+        first = cache.get('job-1', job_text, job_skills)
+        self.assertIs(cache.get('job-1', job_text, job_skills), first)
+        self.assertIsNot(cache.get('job-1', job_text + ' Remote.', job_skills), first)
+        cache.get('job-2', job_text, job_skills)
+        cache.get('job-3', job_text, job_skills)
+        self.assertNotIn('job-1', cache)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 3, 'invalidations': 1, 'evictions': 1,
+                                         'size': 2, 'maxEntries': 2})
+        
+        resume = generate_resume(7)
+        self.assertEqual(calculate_match_score(resume, job_text, job_skills, job_id='job-x'),
+                         calculate_match_score(resume, job_text, job_skills))
+        
+        hits = job_artifacts.stats()['hits']
+        payload = {'resumeText': resume, 'jobText': job_text, 'jobSkills': job_skills, 'jobId': 'posting-9'}
+        plain = self.app.post('/api/ml/calculate-match', json=dict(payload, jobId=None)).get_json()
+        self.assertEqual(self.app.post('/api/ml/calculate-match', json=payload).get_json(), plain)
+        self.assertEqual(self.app.post('/api/ml/calculate-match',
+                                       json=dict(payload, resumeText=resume + ' Git.')).status_code, 200)
+        self.assertEqual(job_artifacts.stats()['hits'], hits + 1)
+        self.assertEqual(self.app.delete('/api/ml/jobs/posting-9').status_code, 200)
+        self.assertNotIn('posting-9', job_artifacts)
+
 if __name__ == '__main__':
     unittest.main()
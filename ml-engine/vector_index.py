@@ -0,0 +1,371 @@
+import fcntl
+import json
+import os
+import threading
+import logging
+from contextlib import contextmanager
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+logger = logging.getLogger(__name__)
+
+# Fixed hashed vocabulary, so vectors never need refitting as the pool grows
+N_FEATURES = 2 ** 18
+
+_vectorizer = HashingVectorizer(
+    n_features=N_FEATURES,
+    stop_words='english',
+    ngram_range=(1, 2),
+    lowercase=True,
+    alternate_sign=False,
+    norm=None
+)
+
+def vectorize(texts):
+    """Hash texts into L2-normalized, sublinear-TF sparse rows"""
+    matrix = _vectorizer.transform([text or "" for text in texts]).tocsr()
+    np.log1p(matrix.data, out=matrix.data)
+    return normalize(matrix, norm='l2', copy=False).astype(np.float32)
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, via argpartition"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class VectorIndex:
+    """Document vector index with incremental add/remove and top-k search.
+
+    The compacted matrix lives on disk as memory-mapped CSR arrays. Adds and
+    removes are appended to a journal that every process replays before
+    searching, and the journal is folded into a new matrix once it grows past
+    ``compact_every`` entries. Without a directory the index is in-memory only
+    and the added rows are folded into an in-memory matrix on the same schedule.
+    Each document may carry a small JSON-serializable ``meta`` dict.
+    """
+
+    def __init__(self, index_dir=None, compact_every=5000):
+        self.index_dir = index_dir
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._journal_offset = 0
+        self._journal_entries = 0
+        # (inode, mtime, size) of the manifest as last read, to skip unchanged re-reads
+        self._manifest_stamp = ()
+        self._reset(None, [])
+
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+            self._sync()
+
+    @classmethod
+    def from_env(cls, prefix):
+        """Build an index from <prefix>_DIR and <prefix>_COMPACT_EVERY.
+
+        An in-memory index is private to one process, so with several web
+        workers (WEB_CONCURRENCY > 1, set by gunicorn.conf) it is refused.
+        """
+        index_dir = os.environ.get(f'{prefix}_DIR') or None
+        if not index_dir and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+            raise ValueError(f"{prefix}_DIR must be set when running more than one web worker")
+        return cls(
+            index_dir=index_dir,
+            compact_every=int(os.environ.get(f'{prefix}_COMPACT_EVERY', 5000))
+        )
+
+    # ── In-memory state ────────────────────────────────────────────────────
+
+    def _reset(self, base, base_ids, base_meta=None):
+        self._base = base
+        self._base_ids = list(base_ids)
+        self._base_dead = np.zeros(len(self._base_ids), dtype=bool)
+        self._delta_data = []
+        self._delta_indices = []
+        self._delta_ids = []
+        self._delta_dead = []
+        self._delta_matrix = None
+        self._rows = {doc_id: ('base', i) for i, doc_id in enumerate(self._base_ids)}
+        self._meta = dict(base_meta or {})
+
+    def _kill(self, doc_id):
+        self._meta.pop(doc_id, None)
+        location = self._rows.pop(doc_id, None)
+        if location is None:
+            return False
+        tier, i = location
+        if tier == 'base':
+            self._base_dead[i] = True
+        else:
+            self._delta_dead[i] = True
+        return True
+
+    def _apply(self, entry):
+        doc_id = entry['id']
+        self._kill(doc_id)
+        if entry['op'] == 'add':
+            self._rows[doc_id] = ('delta', len(self._delta_ids))
+            self._delta_data.append(np.asarray(entry['data'], dtype=np.float32))
+            self._delta_indices.append(np.asarray(entry['indices'], dtype=np.int32))
+            self._delta_ids.append(doc_id)
+            if entry.get('meta') is not None:
+                self._meta[doc_id] = entry['meta']
+            self._delta_dead.append(False)
+            self._delta_matrix = None
+
+    # ── Disk layout ────────────────────────────────────────────────────────
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize journal writes and compaction across worker processes"""
+        with open(self._path('index.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _stamp(self, name):
+        try:
+            stat = os.stat(self._path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read_manifest(self):
+        try:
+            with open(self._path('manifest.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'generation': 0, 'ids': []}
+
+    def _load_base(self, manifest):
+        generation = manifest['generation']
+        if not manifest['ids']:
+            return None
+        arrays = [np.load(self._path(f"{name}-{generation}.npy"), mmap_mode='r')
+                  for name in ('data', 'indices', 'indptr')]
+        return sp.csr_matrix(tuple(arrays), shape=(len(manifest['ids']), N_FEATURES), copy=False)
+
+    def _sync(self):
+        """Catch up with compactions and journal entries written by any process"""
+        if not self.index_dir:
+            return
+        with self._lock:
+            # Compaction replaces the manifest, so an unchanged stamp means no new generation
+            stamp = self._stamp('manifest.json')
+            if stamp != self._manifest_stamp:
+                manifest = self._read_manifest()
+                self._manifest_stamp = stamp
+                if manifest['generation'] != self._generation:
+                    self._generation = manifest['generation']
+                    self._reset(self._load_base(manifest), manifest['ids'], manifest.get('meta'))
+                    self._journal_offset = 0
+                    self._journal_entries = 0
+
+            journal_path = self._path(f"journal-{self._generation}.ndjson")
+            try:
+                if os.path.getsize(journal_path) <= self._journal_offset:
+                    return
+            except FileNotFoundError:
+                return
+            with open(journal_path, 'rb') as journal:
+                journal.seek(self._journal_offset)
+                for line in journal:
+                    if not line.endswith(b'\n'):
+                        break  # partially written entry; pick it up next time
+                    self._journal_offset += len(line)
+                    self._journal_entries += 1
+                    self._apply(json.loads(line))
+
+    def _compact(self):
+        """Fold the journal into a new memory-mapped matrix generation"""
+        with self._lock:
+            ids, matrix = self._live_matrix()
+            generation = self._generation + 1
+            if ids:
+                for name, array in (('data', matrix.data), ('indices', matrix.indices), ('indptr', matrix.indptr)):
+                    np.save(self._path(f"{name}-{generation}.npy"), array)
+
+            manifest_tmp = self._path('manifest.json.tmp')
+            with open(manifest_tmp, 'w') as f:
+                meta = {doc_id: self._meta[doc_id] for doc_id in ids if doc_id in self._meta}
+                json.dump({'generation': generation, 'ids': ids, 'meta': meta}, f)
+            os.replace(manifest_tmp, self._path('manifest.json'))
+
+            # Open memory maps keep the old files readable after unlinking
+            for name in (f"data-{self._generation}.npy", f"indices-{self._generation}.npy",
+                         f"indptr-{self._generation}.npy", f"journal-{self._generation}.ndjson"):
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+            logger.info(f"Compacted index {self.index_dir} to generation {generation} with {len(ids)} documents")
+            self._sync()
+
+    def _compact_in_memory(self):
+        """Fold the added rows into a new base matrix (index without a directory)"""
+        with self._lock:
+            ids, matrix = self._live_matrix()
+            meta = {doc_id: self._meta[doc_id] for doc_id in ids if doc_id in self._meta}
+            self._reset(matrix, ids, meta)
+            self._generation += 1
+            self._journal_entries = 0
+
+    def _delta(self):
+        """Journal rows stacked into one CSR matrix, cached until the next add"""
+        if self._delta_matrix is None:
+            indptr = np.zeros(len(self._delta_ids) + 1, dtype=np.int64)
+            np.cumsum([len(indices) for indices in self._delta_indices], out=indptr[1:])
+            self._delta_matrix = sp.csr_matrix(
+                (np.concatenate(self._delta_data), np.concatenate(self._delta_indices), indptr),
+                shape=(len(self._delta_ids), N_FEATURES)
+            )
+        return self._delta_matrix
+
+    def _live_matrix(self):
+        """IDs and stacked rows of every live document"""
+        parts, ids = [], []
+        if self._base is not None and len(self._base_ids):
+            alive = np.flatnonzero(~self._base_dead)
+            parts.append(self._base[alive])
+            ids.extend(self._base_ids[i] for i in alive)
+        delta_alive = [i for i, dead in enumerate(self._delta_dead) if not dead]
+        if delta_alive:
+            parts.append(self._delta()[delta_alive])
+            ids.extend(self._delta_ids[i] for i in delta_alive)
+        if not parts:
+            return [], None
+        return ids, sp.vstack(parts, format='csr')
+
+    def _write(self, entries):
+        """Record entries in the journal (or apply them directly when in-memory)"""
+        if not self.index_dir:
+            with self._lock:
+                for entry in entries:
+                    self._apply(entry)
+                self._journal_entries += len(entries)
+                if self._journal_entries >= self.compact_every:
+                    self._compact_in_memory()
+            return
+
+        with self._file_lock():
+            self._sync()
+            journal_path = self._path(f"journal-{self._generation}.ndjson")
+            with open(journal_path, 'a') as journal:
+                journal.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            self._sync()
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+
+    # ── Public API ─────────────────────────────────────────────────────────
+
+    def add(self, documents):
+        """Add or replace documents given as (id, text) or (id, text, meta) tuples"""
+        documents = [(str(doc[0]), doc[1], doc[2] if len(doc) > 2 else None) for doc in documents]
+        if not documents:
+            return 0
+        matrix = vectorize([text for _, text, _ in documents])
+        entries = []
+        for i, (doc_id, _, meta) in enumerate(documents):
+            start, end = matrix.indptr[i], matrix.indptr[i + 1]
+            entry = {
+                'op': 'add',
+                'id': doc_id,
+                'indices': matrix.indices[start:end].tolist(),
+                'data': np.round(matrix.data[start:end].astype(np.float64), 6).tolist()
+            }
+            if meta is not None:
+                entry['meta'] = meta
+            entries.append(entry)
+        self._write(entries)
+        return len(entries)
+
+    def remove(self, doc_ids):
+        """Remove documents by ID; returns how many were present"""
+        self._sync()
+        with self._lock:
+            present = [str(doc_id) for doc_id in doc_ids if str(doc_id) in self._rows]
+        self._write([{'op': 'remove', 'id': doc_id} for doc_id in present])
+        return len(present)
+
+    def score_all(self, text):
+        """Cosine similarity of text against every row.
+
+        Returns ``(ids, scores, live)`` where removed rows score ``-inf`` and
+        ``live`` is the number of documents still in the index.
+        """
+        self._sync()
+        # A dense query keeps the product on scipy's fast CSR matrix-vector path
+        query = vectorize([text]).toarray().ravel()
+        with self._lock:
+            scores = []
+            if self._base is not None and len(self._base_ids):
+                base_scores = self._base.dot(query)
+                base_scores[self._base_dead] = -np.inf
+                scores.append(base_scores)
+            if self._delta_ids:
+                delta_scores = self._delta().dot(query)
+                delta_scores[np.asarray(self._delta_dead, dtype=bool)] = -np.inf
+                scores.append(delta_scores)
+            ids = self._base_ids + self._delta_ids
+            live = len(self._rows)
+
+        scores = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+        return ids, scores, live
+
+    def search(self, text, k=10):
+        """Return the top-k (id, similarity) pairs for a query text"""
+        ids, scores, live = self.score_all(text)
+        return [(ids[i], float(scores[i])) for i in top_k(scores, min(k, live))]
+
+    def get_meta(self, doc_id):
+        """Metadata stored with a document, or None"""
+        self._sync()
+        with self._lock:
+            return self._meta.get(str(doc_id))
+
+    def get_metas(self, doc_ids):
+        """Metadata for many documents as of the last sync, without re-syncing"""
+        with self._lock:
+            return [self._meta.get(doc_id) for doc_id in doc_ids]
+
+    def compact(self):
+        """Force a compaction of the journal into the memory-mapped matrix"""
+        if not self.index_dir:
+            self._compact_in_memory()
+            return
+        with self._file_lock():
+            self._sync()
+            self._compact()
+
+    def __len__(self):
+        self._sync()
+        with self._lock:
+            return len(self._rows)
+
+    def __contains__(self, doc_id):
+        self._sync()
+        with self._lock:
+            return str(doc_id) in self._rows
+
+    def stats(self):
+        """Index size and storage details"""
+        self._sync()
+        with self._lock:
+            return {
+                'size': len(self._rows),
+                'baseRows': len(self._base_ids),
+                'journalEntries': self._journal_entries,
+                'generation': self._generation,
+                'persistent': bool(self.index_dir),
+                'features': N_FEATURES
+            }